@@ -1,35 +1,148 @@
-
 import re
-import PyPDF2
-import io
+import hashlib
 import json
-import tempfile
-import os
-
-from euriai import EuriaiEmbeddings, EuriaiLangChainLLM
-from langchain_community.vectorstores import FAISS
-from langchain.chains import RetrievalQA
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import threading
+import time
 
 from concurrent.futures import ThreadPoolExecutor
 
+from extraction import EmptyDocumentError, ExtractionError, extract_pdf_text, extract_txt_text
+from cache import get_embedding_cache, get_response_cache
+from jd_profile import build_profile, profile_skills, profile_weights
+from metrics import Trace, estimate_tokens, logger, registry
+from prompt_context import select_context, split_sections, trim_boilerplate
+from resume_sections import find_sections, section_chunks
+from scoring import (
+    MISSING_SKILL_SCORE, STRENGTH_SCORE, distinct_rows, get_skill_matcher, get_skill_vectors, score_skills,
+    vectorstore_matrix,
+)
+
+LLM_MODEL = "gpt-4.1-nano"
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Completion budgets for the streamed follow-up calls.
+QA_MAX_TOKENS = 400
+IMPROVE_MAX_TOKENS = 500
+REWRITE_MAX_TOKENS = 800
+CONTEXT_TOKEN_BUDGET = 1500
+
+# Defaults shared by the UI and background prefetching, so prefetched answers match what users request.
+DEFAULT_IMPROVEMENT_AREAS = ["Keyword Optimization", "Achievements Highlight"]
+MAX_HIGHLIGHT_SKILLS = 5
+
+# Retrieval queries for non-technical interview questions; technical ones query the analyzed skills.
+INTERVIEW_FOCUS = {
+    "Behavioral": ["teamwork and collaboration", "leadership and ownership", "handling conflict or feedback"],
+    "Situational": ["challenging project or tight deadline", "problem solving under uncertainty",
+                    "technical trade-offs and decisions"],
+}
+# Questions at least this similar (cosine) to an earlier one are dropped as near-duplicates.
+DUPLICATE_QUESTION_SIMILARITY = 0.9
+# "batch": grouped LLM calls, "per_skill": one RetrievalQA call per skill, "fast": embeddings only.
+SCORING_MODES = ("batch", "per_skill", "fast")
+# Resume sections searched for evidence when scoring skills (see resume_sections.py).
+SKILL_SECTIONS = ("header", "summary", "experience", "skills", "projects", "certifications")
+# Dependencies loaded on first use rather than at import; ``warm_up`` loads them ahead of time.
+HEAVY_MODULES = ("langchain_adapters", "langchain_community.vectorstores", "langchain.chains",
+                 "langchain_text_splitters", "PyPDF2")
+
+
+def _in_sections(metadata, wanted):
+    # Chunks without section metadata (recursive chunking) are never filtered out.
+    return "sections" not in metadata or not wanted.isdisjoint(metadata["sections"])
+
+
+def _section_positions(vectorstore, sections):
+    """Index positions of the chunks in ``sections``; all positions if none are given or none match."""
+    positions = list(range(vectorstore.index.ntotal))
+    if sections:
+        wanted = set(sections)
+        matching = [i for i in positions
+                    if _in_sections(vectorstore.docstore.search(vectorstore.index_to_docstore_id[i]).metadata, wanted)]
+        if matching:
+            return matching
+    return positions
+
+
+def _section_search_kwargs(vectorstore, sections, k):
+    """Search kwargs for the top-k chunks in ``sections``, unrestricted if that would not narrow the search."""
+    kwargs = {"k": k}
+    if sections and len(_section_positions(vectorstore, sections)) < vectorstore.index.ntotal:
+        wanted = set(sections)
+        kwargs.update(fetch_k=vectorstore.index.ntotal, filter=lambda metadata: _in_sections(metadata, wanted))
+    return kwargs
+
+
+def preload(api_key=None):
+    """Import the lazily loaded dependencies and open the shared clients and caches."""
+    import importlib
+    from llm_client import get_client
+    started = time.perf_counter()
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    get_embedding_cache()
+    get_response_cache()
+    if api_key:
+        get_client(api_key)
+    registry.observe_stage("warm_up", time.perf_counter() - started)
+
+
+def warm_up(api_key=None):
+    """Run ``preload`` on a background thread, so the first analysis does not pay for it; returns the thread."""
+    def run():
+        try:
+            preload(api_key)
+        except Exception:
+            logger.exception("Warm-up failed")
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
 
 class ResumeAnalysisAgent:
-    def __init__(self, api_key, cutoff_score=75):
+    def __init__(self, api_key, cutoff_score=75, scoring_mode="batch", skill_batch_size=8, max_workers=8,
+                 lexical_prefilter=True, pdf_workers=None, context_token_budget=CONTEXT_TOKEN_BUDGET,
+                 chunking="section", skill_sections=SKILL_SECTIONS):
         self.api_key = api_key
         self.cutoff_score = cutoff_score
+        # One of SCORING_MODES.
+        self.scoring_mode = scoring_mode
+        self.skill_batch_size = skill_batch_size
+        # Settle skills that are plainly present or absent in the text before calling the LLM.
+        self.lexical_prefilter = lexical_prefilter
+        # Processes used to extract pages of long PDFs; None extracts in-process.
+        self.pdf_workers = pdf_workers
+        # Resume tokens allowed in an improvement or rewrite prompt before it is cut down or split.
+        self.context_token_budget = context_token_budget
+        # "section": chunks follow the resume's sections and bullets; "recursive": fixed-size overlapping chunks.
+        self.chunking = chunking
+        # Sections searched for skill evidence; None searches the whole resume.
+        self.skill_sections = skill_sections
+        # Upper bound on concurrent calls per analysis; pacing is left to the shared client's rate limiter.
+        self.max_workers = max_workers
         self.resume_text = None
+        self.resume_hash = None
         self.rag_vectorstore = None
         self.analysis_result = None
         self.jd_text = None
+        self.jd_profile = None
         self.extracted_skills = None
         self.resume_weaknesses = []
         self.resume_strengths = []
         self.improvement_suggestions = {}
-        self._temp_files = []
-
-    def _register_temp_file(self, path):
-        self._temp_files.append(path)
+        # Seconds from request to first streamed token, by method name, for the most recent call.
+        self.time_to_first_token = {}
+        # Resume tokens left out of the most recent prompt, by method name.
+        self.prompt_token_savings = {}
+        # Stage timings and counters for the current analysis and the follow-up calls made on it.
+        self.trace = Trace("idle")
+        # Per-resume handles, created on first use and reused by every later call on the same resume.
+        self._llms = {}
+        self._embedding_client = None
+        self._qa_retriever = None
+        self._skill_chain = None
+        self._index_lock = threading.Lock()
 
     def _normalize_response(self, response):
         """Ensure response is a clean string."""
@@ -43,180 +156,648 @@ class ResumeAnalysisAgent:
         return str(response)
 
     def extract_text_from_pdf(self, pdf_file):
-        try:
-            if hasattr(pdf_file, 'getvalue'):
-                pdf_data = pdf_file.getvalue()
-                pdf_file_like = io.BytesIO(pdf_data)
-                reader = PyPDF2.PdfReader(pdf_file_like)
-            else:
-                reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text
-            return text.strip()
-        except Exception as e:
-            print(f"Error extracting text from PDF: {e}")
-            return ""
+        return extract_pdf_text(pdf_file, workers=self.pdf_workers)
 
     def extract_text_from_txt(self, txt_file):
-        try:
-            if hasattr(txt_file, 'getvalue'):
-                return txt_file.getvalue().decode('utf-8')
-            else:
-                with open(txt_file, 'r', encoding='utf-8') as f:
-                    return f.read()
-        except Exception as e:
-            print(f"Error extracting text from TXT: {e}")
-            return ""
+        return extract_txt_text(txt_file)
 
     def extract_text_from_file(self, file):
+        """Extract text from a PDF or TXT upload or path; raises ExtractionError if it cannot be read."""
         ext = file.name.split('.')[-1].lower() if hasattr(file, 'name') else file.split('.')[-1].lower()
         if ext == 'pdf':
             return self.extract_text_from_pdf(file)
         elif ext == 'txt':
             return self.extract_text_from_txt(file)
         else:
-            print(f"Unsupported file type: {ext}")
-            return ""
+            raise ExtractionError(f"Unsupported file type: {ext}")
 
-    def create_rag_vector_store(self, text):
+    def _reset_resume_state(self, trace_name):
+        """Start a new trace and drop the handles tied to the previous resume."""
+        self.trace = Trace(trace_name)
+        self._llms = {}
+        self._embedding_client = None
+        self._qa_retriever = None
+        self._skill_chain = None
+
+    def _llm(self, temperature=0.7, max_tokens=300):
+        """LLM handle on the process-wide pooled client, reused for each (temperature, max_tokens)."""
+        key = (self.api_key, temperature, max_tokens)
+        llm = self._llms.get(key)
+        if llm is None:
+            from langchain_adapters import EuriLLM
+            llm = EuriLLM(api_key=self.api_key, model=LLM_MODEL, temperature=temperature, max_tokens=max_tokens,
+                          observer=self.trace)
+            self._llms[key] = llm
+        return llm
+
+    def _embeddings(self):
+        """Embeddings client backed by the persistent embedding cache."""
+        client = self._embedding_client
+        if client is None or client.embeddings.api_key != self.api_key:
+            from langchain_adapters import CachedEmbeddings, EuriEmbeddings
+            embeddings = EuriEmbeddings(api_key=self.api_key, model=EMBEDDING_MODEL, observer=self.trace)
+            client = self._embedding_client = CachedEmbeddings(embeddings, EMBEDDING_MODEL, observer=self.trace)
+        return client
+
+    def embedding_cache_stats(self):
+        return get_embedding_cache().stats()
+
+    def response_cache_stats(self):
+        return get_response_cache().stats()
+
+    def metrics(self):
+        """The current trace as a dict: stage timings in order, per-stage totals and counters."""
+        return self.trace.to_dict()
+
+    def _first_token(self, name, started):
+        # Kept per agent for the UI and recorded as a ``ttft.<name>`` stage for the metrics dumps.
+        seconds = time.perf_counter() - started
+        self.time_to_first_token[name] = seconds
+        self.trace.observe(f"ttft.{name}", seconds)
+
+    def _stream_response(self, name, cache_prompt, temperature, max_tokens, build_prompt, fresh=False,
+                         generate=None):
+        """Stream an LLM response, serving it from the response cache when possible.
+
+        ``build_prompt`` is only called on a cache miss, so retrieval work is skipped for cached answers.
+        ``generate``, if given, replaces the single streamed call with a chunk iterator of its own.
+        ``fresh=True`` skips the lookup but still stores the new answer.
+        """
+        cache = get_response_cache()
+        key = cache.key(LLM_MODEL, temperature, max_tokens, cache_prompt, self.resume_hash)
+        started = time.perf_counter()
+        if not fresh:
+            cached = cache.get(key)
+            if cached is not None:
+                self.trace.count("response_cache_hits")
+                self._first_token(name, started)
+                yield cached
+                return
+            self.trace.count("response_cache_misses")
+        if generate is not None:
+            chunks = generate()
+        else:
+            chunks = self._llm(temperature=temperature, max_tokens=max_tokens).stream(build_prompt())
+        parts = []
+        with self.trace.stage(f"llm.{name}"):
+            for chunk in chunks:
+                if not parts:
+                    self._first_token(name, started)
+                parts.append(chunk)
+                yield chunk
+        cache.put(key, "".join(parts))
+
+    def _chunks(self, text):
+        """``(chunk, metadata)`` pairs of ``text`` for the configured chunking."""
+        if self.chunking == "section":
+            return section_chunks(text)
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
         splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len)
-        chunks = splitter.split_text(text)
-        embeddings = EuriaiEmbeddings(api_key=self.api_key)
-        return FAISS.from_texts(chunks, embeddings)
+        return [(chunk, {}) for chunk in splitter.split_text(text)]
 
-    def create_vector_store(self, text):
-        embeddings = EuriaiEmbeddings(api_key=self.api_key)
-        return FAISS.from_texts([text], embeddings)
+    def split_text(self, text):
+        return [chunk for chunk, _ in self._chunks(text)]
+
+    def resume_sections(self):
+        """Sections found in the current resume, in document order, for section-filtered questions."""
+        if not self.resume_text:
+            return []
+        return list(dict.fromkeys(section for section, _, _ in find_sections(self.resume_text)))
+
+    def create_rag_vector_store(self, text):
+        from langchain_community.vectorstores import FAISS
+        with self.trace.stage("chunking"):
+            chunks = self._chunks(text)
+        self.trace.count("chunks", len(chunks))
+        self.trace.count("chunk_chars", sum(len(chunk) for chunk, _ in chunks))
+        with self.trace.stage("embedding"):
+            return FAISS.from_texts([chunk for chunk, _ in chunks], self._embeddings(),
+                                    metadatas=[metadata for _, metadata in chunks])
+
+    def candidate_corpus(self, path=None):
+        """Open the persistent multi-candidate index, using this agent's chunking and embeddings."""
+        from corpus import CandidateCorpus
+        return CandidateCorpus(self._embeddings(), self.split_text, path=path)
 
     def analyze_skill(self, qa_chain, skill):
         query = f"Rate proficiency in {skill} (0-10) and explain."
-        response = qa_chain.invoke(query)
+        with self.trace.stage("llm.skill"):
+            response = qa_chain.invoke(query)
         text = self._normalize_response(response)
         score_match = re.search(r"(\d{1,2})", text)
         score = int(score_match.group(1)) if score_match else 0
         reasoning = text.split('.', 1)[1].strip() if '.' in text else ""
         return skill, min(score, 10), reasoning
 
-    def semantic_skill_analysis(self, resume_text, skills):
-        vectorstore = self.create_vector_store(resume_text)
-        retriever = vectorstore.as_retriever()
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=EuriaiLangChainLLM(api_key=self.api_key, model="gpt-4.1-nano", temperature=0.7, max_tokens=300),
-            retriever=retriever,
-            return_source_documents=False
+    def _retrieve_context(self, vectorstore, queries, k=3, sections=None):
+        """Retrieve the top-k chunks for each query, from ``sections`` if given, and merge them into one block."""
+        embeddings = vectorstore.embeddings
+        with self.trace.stage("retrieval"):
+            search_kwargs = _section_search_kwargs(vectorstore, sections, k)
+            if embeddings is not None:
+                query_vectors = embeddings.embed_documents(list(queries))
+                doc_lists = [vectorstore.similarity_search_by_vector(v, **search_kwargs) for v in query_vectors]
+            else:
+                doc_lists = [vectorstore.similarity_search(q, **search_kwargs) for q in queries]
+        seen = set()
+        chunks = []
+        for docs in doc_lists:
+            for doc in docs:
+                if doc.page_content not in seen:
+                    seen.add(doc.page_content)
+                    chunks.append(doc.page_content)
+        return "\n\n".join(chunks)
+
+    def _skill_batch_prompt(self, skills, context):
+        skill_list = "\n".join(f"- {skill}" for skill in skills)
+        return (
+            "Rate the candidate's proficiency in each of the skills below on a scale of 0-10, "
+            "using only the resume excerpts provided, and briefly explain each rating.\n\n"
+            f"Resume excerpts:\n{context}\n\n"
+            f"Skills:\n{skill_list}\n\n"
+            "Respond with JSON only, one entry per skill, using the skill names exactly as listed:\n"
+            '{"<skill>": {"score": <0-10>, "reasoning": "<one or two sentences>"}}'
         )
+
+    def _parse_skill_batch(self, text, skills):
+        """Parse a batched scoring response, keeping only the skills whose entries validate."""
+        match = re.search(r"\{.*\}", text, re.DOTALL)
+        if not match:
+            return {}
+        try:
+            data = json.loads(match.group(0))
+        except ValueError:
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        entries = {str(key).strip().lower(): value for key, value in data.items()}
+        parsed = {}
+        for skill in skills:
+            entry = entries.get(skill.lower())
+            if not isinstance(entry, dict):
+                continue
+            try:
+                score = float(entry.get("score"))
+            except (TypeError, ValueError):
+                continue
+            if not 0 <= score <= 10:
+                continue
+            parsed[skill] = (int(round(score)), str(entry.get("reasoning", "")).strip())
+        return parsed
+
+    def analyze_skill_batch(self, vectorstore, skills):
+        """Score a group of skills with one LLM call over their shared retrieved context."""
+        context = self._retrieve_context(vectorstore, skills, sections=self.skill_sections)
+        llm = self._llm(temperature=0.3, max_tokens=60 + 80 * len(skills))
+        try:
+            with self.trace.stage("llm.skill_batch"):
+                text = self._normalize_response(llm.invoke(self._skill_batch_prompt(skills, context)))
+        except Exception:
+            logger.exception("Error scoring skill batch %s", skills)
+            return {}
+        parsed = self._parse_skill_batch(text, skills)
+        if len(parsed) < len(skills):
+            self.trace.count("skill_batch_parse_failures", len(skills) - len(parsed))
+            logger.warning("Batch response had no valid entry for %s", [s for s in skills if s not in parsed])
+        return parsed
+
+    def _score_skills_batched(self, vectorstore, skills):
+        size = max(1, self.skill_batch_size)
+        groups = [skills[i:i + size] for i in range(0, len(skills), size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            batches = list(executor.map(lambda group: self.analyze_skill_batch(vectorstore, group), groups))
+        scored = {}
+        for batch in batches:
+            scored.update(batch)
+
+        paths = dict.fromkeys(scored, "llm_batch")
+
+        failed = [skill for skill in skills if skill not in scored]
+        if failed:
+            qa_chain = self._skill_qa_chain(vectorstore)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for skill, score, reasoning in executor.map(lambda skill: self.analyze_skill(qa_chain, skill), failed):
+                    scored[skill] = (score, reasoning)
+                    paths[skill] = "llm_fallback"
+        return [(skill, *scored[skill], paths[skill]) for skill in skills]
+
+    def precompute_skill_vectors(self, role_requirements):
+        """Embed every role skill ahead of time so fast scoring needs no embedding calls per resume."""
+        return get_skill_vectors().precompute(role_requirements, self._embeddings(), EMBEDDING_MODEL)
+
+    def _score_skills_fast(self, vectorstore, skills):
+        """Score skills by cosine similarity against the resume's chunk vectors, without any LLM call."""
+        skill_matrix = get_skill_vectors().matrix(skills, self._embeddings(), EMBEDDING_MODEL)
+        positions = _section_positions(vectorstore, self.skill_sections)
+        scores, similarities, best_chunks = score_skills(skill_matrix, vectorstore_matrix(vectorstore)[positions])
+        results = []
+        for skill, score, similarity, chunk in zip(skills, scores, similarities, best_chunks):
+            doc = vectorstore.docstore.search(vectorstore.index_to_docstore_id[positions[int(chunk)]])
+            excerpt = " ".join(doc.page_content.split())[:160]
+            reasoning = f"Closest resume excerpt (similarity {similarity:.2f}): \"{excerpt}\""
+            results.append((skill, int(score), reasoning, "embedding"))
+        return results
+
+    def _skill_qa_chain(self, vectorstore):
+        """RetrievalQA chain for per-skill scoring, built once per vector store."""
+        if self._skill_chain is None or self._skill_chain[0] is not vectorstore:
+            from langchain.chains import RetrievalQA
+            chain = RetrievalQA.from_chain_type(
+                llm=self._llm(temperature=0.7, max_tokens=300),
+                retriever=vectorstore.as_retriever(
+                    search_kwargs=_section_search_kwargs(vectorstore, self.skill_sections, 3)
+                ),
+                return_source_documents=False
+            )
+            self._skill_chain = (vectorstore, chain)
+        return self._skill_chain[1]
+
+    def profile_job_description(self, jd_text):
+        """Return the structured skill profile of a JD, extracting it once per distinct JD content."""
+        cache = get_response_cache()
+        key = cache.key(LLM_MODEL, 0.0, 600, f"JD profile: {jd_text}")
+        llm = self._llm(temperature=0.0, max_tokens=600)
+        with self.trace.stage("jd_profile"):
+            return build_profile(jd_text, lambda prompt: self._normalize_response(llm.invoke(prompt)), cache, key)
+
+    def extract_skills_from_jd(self, jd_text):
+        self.jd_profile = self.profile_job_description(jd_text)
+        return profile_skills(self.jd_profile)
+
+    def _score_skills(self, resume_text, skills, vectorstore):
+        """Return ``(skill, score, reasoning, path)`` tuples using the configured scoring mode."""
+        if self.scoring_mode == "fast":
+            return self._score_skills_fast(vectorstore, skills)
+        decided, pending = {}, list(skills)
+        if self.lexical_prefilter:
+            decided, pending = get_skill_matcher(skills).triage(resume_text)
+        if self.scoring_mode == "batch":
+            scored = self._score_skills_batched(vectorstore, pending) if pending else []
+        else:
+            qa_chain = self._skill_qa_chain(vectorstore)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                scored = [(*result, "llm") for result in
+                          executor.map(lambda skill: self.analyze_skill(qa_chain, skill), pending)]
+        by_skill = {result[0]: result for result in scored}
+        return [by_skill[skill] if skill in by_skill else (skill, *decided[skill]) for skill in skills]
+
+    def semantic_skill_analysis(self, resume_text, skills, vectorstore=None, weights=None):
+        """Score skills against the resume, reusing its RAG vector store when one is already built.
+
+        ``weights`` maps skills to their weight in the overall score; skills default to 1.
+        """
+        if vectorstore is None:
+            if self.rag_vectorstore is not None and resume_text == self.resume_text:
+                vectorstore = self.rag_vectorstore
+            else:
+                vectorstore = self.create_rag_vector_store(resume_text)
+        with self.trace.stage("scoring"):
+            results = self._score_skills(resume_text, skills, vectorstore)
+
         skill_scores = {}
         skill_reasoning = {}
+        skill_paths = {}
         missing_skills = []
         total_score = 0
+        total_weight = 0
 
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            results = list(executor.map(lambda skill: self.analyze_skill(qa_chain, skill), skills))
-
-        for skill, score, reasoning in results:
+        for skill, score, reasoning, path in results:
+            weight = weights.get(skill, 1) if weights else 1
             skill_scores[skill] = score
             skill_reasoning[skill] = reasoning
-            total_score += score
-            if score <= 5:
+            skill_paths[skill] = path
+            self.trace.count(f"skills_scored.{path}")
+            total_score += score * weight
+            total_weight += weight
+            if score <= MISSING_SKILL_SCORE:
                 missing_skills.append(skill)
 
-        overall_score = int((total_score / (10 * len(skills))) * 100)
-        strengths = [s for s, sc in skill_scores.items() if sc >= 7]
+        overall_score = int((total_score / (10 * total_weight)) * 100)
+        strengths = [s for s, sc in skill_scores.items() if sc >= STRENGTH_SCORE]
         self.resume_strengths = strengths
         return {
             "overall_score": overall_score,
             "skill_scores": skill_scores,
             "skill_reasoning": skill_reasoning,
+            "skill_paths": skill_paths,
+            "skill_weights": dict(weights) if weights else None,
             "selected": overall_score >= self.cutoff_score,
             "missing_skills": missing_skills,
             "strengths": strengths
         }
 
-    def analyze_resume(self, resume_file, role_requirements=None, custom_jd=None):
-        self.resume_text = self.extract_text_from_file(resume_file)
-        tmp_path = tempfile.NamedTemporaryFile(delete=False, suffix='.txt', mode='w', encoding='utf-8').name
-        with open(tmp_path, 'w', encoding='utf-8') as tmp:
-            tmp.write(self.resume_text)
-        self._register_temp_file(tmp_path)
+    def analyze_resume(self, resume_file, role_requirements=None, custom_jd=None, jd_profile=None):
+        """Analyze a resume against a role's skills, a JD file, or an already extracted JD profile."""
+        self._reset_resume_state("analyze_resume")
+        with self.trace.stage("extraction"):
+            self.resume_text = self.extract_text_from_file(resume_file)
+        if not self.resume_text.strip():
+            raise EmptyDocumentError("The resume contains no extractable text.")
+        self.resume_hash = hashlib.sha256(self.resume_text.encode('utf-8')).hexdigest()
         self.rag_vectorstore = self.create_rag_vector_store(self.resume_text)
 
-        if custom_jd:
-            self.jd_text = self.extract_text_from_file(custom_jd)
-            self.extracted_skills = self.extract_skills_from_jd(self.jd_text)
-            self.analysis_result = self.semantic_skill_analysis(self.resume_text, self.extracted_skills)
+        if jd_profile is not None or custom_jd:
+            if jd_profile is not None:
+                self.jd_profile = jd_profile
+                self.extracted_skills = profile_skills(jd_profile)
+            else:
+                with self.trace.stage("jd_extraction"):
+                    self.jd_text = self.extract_text_from_file(custom_jd)
+                if not self.jd_text.strip():
+                    raise EmptyDocumentError("The job description contains no extractable text.")
+                self.extracted_skills = self.extract_skills_from_jd(self.jd_text)
+            self.analysis_result = self.semantic_skill_analysis(
+                self.resume_text, self.extracted_skills, vectorstore=self.rag_vectorstore,
+                weights=profile_weights(self.jd_profile)
+            )
         elif role_requirements:
             self.extracted_skills = role_requirements
-            self.analysis_result = self.semantic_skill_analysis(self.resume_text, role_requirements)
+            self.analysis_result = self.semantic_skill_analysis(
+                self.resume_text, role_requirements, vectorstore=self.rag_vectorstore
+            )
 
         return self.analysis_result
 
-    def ask_question(self, question):
-        if not self.rag_vectorstore:
-            return "No resume analyzed yet."
-        retriever = self.rag_vectorstore.as_retriever(search_kwargs={"k": 3})
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=EuriaiLangChainLLM(api_key=self.api_key, model="gpt-4.1-nano", temperature=0.7, max_tokens=300),
-            retriever=retriever,
-            return_source_documents=False
+    def _resume_index(self):
+        """The resume's vector store, rebuilt from the embedding cache if it was released."""
+        with self._index_lock:
+            if self.rag_vectorstore is None and self.resume_text:
+                with self.trace.stage("index_rebuild"):
+                    self.rag_vectorstore = self.create_rag_vector_store(self.resume_text)
+                self.trace.count("index_rebuilds")
+            return self.rag_vectorstore
+
+    def release_index(self):
+        """Drop the resume's vector store and the handles built on it; returns the bytes freed (estimated).
+
+        The next call that needs the index rebuilds it, normally without any API call since the chunk
+        embeddings are cached.
+        """
+        with self._index_lock:
+            freed = self.memory_usage()["index_bytes"]
+            self.rag_vectorstore = None
+            self._qa_retriever = None
+            self._skill_chain = None
+            return freed
+
+    def memory_usage(self):
+        """Estimated bytes held for the current resume: its texts and its vector index."""
+        text_bytes = sum(len(text) for text in (self.resume_text, self.jd_text) if text)
+        index_bytes = 0
+        store = self.rag_vectorstore
+        if store is not None:
+            index_bytes = store.index.ntotal * store.index.d * 4
+            index_bytes += sum(len(store.docstore.search(doc_id).page_content)
+                               for doc_id in store.index_to_docstore_id.values())
+        return {"text_bytes": text_bytes, "index_bytes": index_bytes, "total_bytes": text_bytes + index_bytes}
+
+    def _retriever(self):
+        """Q&A retriever over the current resume, reused across questions."""
+        index = self._resume_index()
+        if self._qa_retriever is None or self._qa_retriever.vectorstore is not index:
+            self._qa_retriever = index.as_retriever(search_kwargs={"k": 3})
+        return self._qa_retriever
+
+    def _qa_prompt(self, question, sections=None):
+        with self.trace.stage("retrieval"):
+            if sections:
+                index = self._resume_index()
+                docs = index.similarity_search(question, **_section_search_kwargs(index, sections, 3))
+            else:
+                docs = self._retriever().invoke(question)
+        context = "\n\n".join(doc.page_content for doc in docs)
+        return (
+            "Use the following pieces of context to answer the question at the end. "
+            "If you don't know the answer, just say that you don't know, don't try to make up an answer.\n\n"
+            f"{context}\n\nQuestion: {question}\nHelpful Answer:"
         )
-        response = qa_chain.invoke(question)
-        return self._normalize_response(response)
 
-    # Stub methods to avoid attribute errors
+    def stream_question(self, question, fresh=False, sections=None):
+        """Answer a question about the resume, yielding the answer as it is generated.
 
-    
-    def ask_question(self, question):
-        """Ask a question about the resume"""
-        if not self.rag_vectorstore or not self.resume_text:
-            return "Please analyze a resume first."
-        
-        retriever = self.rag_vectorstore.as_retriever(
-            search_kwargs={"k": 3}  
+        ``sections`` (e.g. ``["skills", "experience"]``) limits the excerpts to those resume sections.
+        """
+        if not self.resume_text:
+            yield "Please analyze a resume first."
+            return
+        cache_prompt = f"Q&A: {question}" + (f" | sections: {sorted(sections)}" if sections else "")
+        yield from self._stream_response(
+            "ask_question", cache_prompt, 0.6, QA_MAX_TOKENS, lambda: self._qa_prompt(question, sections), fresh=fresh
         )
-        
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=EuriaiLangChainLLM(api_key=self.api_key, model="gpt-4.1-nano", temperature=0.6, max_tokens=400),
-            # ChatOpenAI(model="gpt-4o", api_key=self.api_key),
-            chain_type="stuff",  
-            retriever=retriever,
-            return_source_documents=False,
+
+    def ask_question(self, question, fresh=False, sections=None):
+        """Ask a question about the resume"""
+        return "".join(self.stream_question(question, fresh=fresh, sections=sections)).strip()
+
+    def _interview_queries(self, question_type):
+        if question_type in INTERVIEW_FOCUS:
+            return INTERVIEW_FOCUS[question_type]
+        if question_type == "Technical":
+            skills = (self.resume_strengths or []) + (self.extracted_skills or [])
+            return list(dict.fromkeys(skills))[:5] or ["technical skills and tools", "systems and projects built"]
+        return [question_type]
+
+    def _interview_prompt(self, question_type, difficulty, count, context):
+        return (
+            f"Write {count} {difficulty.lower()} {question_type.lower()} interview questions for this candidate, "
+            "based only on the resume excerpts below. Make each question specific to their experience.\n\n"
+            f"Resume excerpts:\n{context}\n\n"
+            'Respond with JSON only, as a list of strings: ["<question>", ...]'
         )
-        
-        raw_response = qa_chain.invoke(question)
-        if isinstance(raw_response, list):
-            combined = ''.join(r.get('text', '') if isinstance(r, dict) else str(r) for r in raw_response)
-        elif isinstance(raw_response, dict):
-            combined = raw_response.get('text') or raw_response.get('content') or str(raw_response)
-        else:
-            combined = str(raw_response)
 
-        return combined.strip()
-    
+    def _parse_questions(self, text):
+        match = re.search(r"\[.*\]", text, re.DOTALL)
+        if match:
+            try:
+                data = json.loads(match.group(0))
+            except ValueError:
+                data = None
+            if isinstance(data, list):
+                return [" ".join(str(q).split()) for q in data if str(q).strip()]
+        # Fall back to one question per line, without list numbering or bullets.
+        lines = (re.sub(r"^\s*(?:\d+[.)]|[-*•])\s*", "", line).strip() for line in text.splitlines())
+        return [line for line in lines if line.endswith("?")]
+
+    def _questions_for_type(self, question_type, difficulty, count):
+        context = self._retrieve_context(self._resume_index(), self._interview_queries(question_type), k=2)
+        llm = self._llm(temperature=0.7, max_tokens=60 + 60 * count)
+        prompt = self._interview_prompt(question_type, difficulty, count, context)
+        with self.trace.stage("llm.interview_questions"):
+            text = self._normalize_response(llm.invoke(prompt))
+        return [(question_type, question) for question in self._parse_questions(text)]
+
+    def generate_interview_questions(self, question_types, difficulty, num_questions, fresh=False):
+        """Generate interview questions from the retrieved resume excerpts relevant to each question type.
 
-    def improve_resume(self, improvement_areas, target_role):
-        llm = EuriaiLangChainLLM(api_key=self.api_key, model="gpt-4.1-nano", temperature=0.7, max_tokens=500)
-        prompt = (
+        Types are generated concurrently, near-duplicates are dropped by embedding similarity, and the
+        result alternates between types. Returns ``{"type", "question"}`` dicts, cached per resume.
+        """
+        if not self.resume_text or not question_types:
+            return []
+        question_types = list(question_types)
+        cache = get_response_cache()
+        key = cache.key(LLM_MODEL, 0.7, num_questions,
+                        f"Interview questions: {question_types} {difficulty} {num_questions}", self.resume_hash)
+        if not fresh:
+            cached = cache.get(key)
+            if cached is not None:
+                self.trace.count("response_cache_hits")
+                return json.loads(cached)
+            self.trace.count("response_cache_misses")
+
+        # Ask each type for a spare question so dropping duplicates still leaves enough.
+        per_type = -(-num_questions // len(question_types)) + 1
+        with ThreadPoolExecutor(max_workers=len(question_types)) as executor:
+            batches = list(executor.map(
+                lambda question_type: self._questions_for_type(question_type, difficulty, per_type), question_types
+            ))
+        # Interleave the types so trimming to num_questions keeps the mix.
+        candidates = [batch[i] for i in range(per_type) for batch in batches if i < len(batch)]
+        if not candidates:
+            return []
+        with self.trace.stage("dedup"):
+            vectors = self._embeddings().embed_documents([question for _, question in candidates])
+            kept = distinct_rows(vectors, DUPLICATE_QUESTION_SIMILARITY)
+        questions = [{"type": candidates[i][0], "question": candidates[i][1]} for i in kept][:num_questions]
+        self.trace.count("duplicate_questions_dropped", len(candidates) - len(kept))
+        cache.put(key, json.dumps(questions))
+        return questions
+
+    def _missing_skills(self):
+        return self.analysis_result["missing_skills"] if self.analysis_result else []
+
+    def _record_context(self, name, context):
+        """Note how many resume tokens a prompt left out."""
+        resume_tokens, context_tokens = estimate_tokens(self.resume_text), estimate_tokens(context)
+        self.prompt_token_savings[name] = {
+            "resume_tokens": resume_tokens,
+            "context_tokens": context_tokens,
+            "saved_tokens": max(0, resume_tokens - context_tokens),
+        }
+        self.trace.count("prompt_tokens_saved", max(0, resume_tokens - context_tokens))
+
+    def _resume_context(self, name, queries):
+        """Resume text for a prompt: whole if it fits the token budget, else the excerpts most relevant to ``queries``."""
+        with self.trace.stage("context"):
+            trimmed = trim_boilerplate(self.resume_text)
+            if estimate_tokens(trimmed) <= self.context_token_budget:
+                context = trimmed
+            else:
+                index = self._resume_index()
+                vectors = index.embeddings.embed_documents(list(queries))
+                doc_lists = [index.similarity_search_by_vector(v, k=6) for v in vectors]
+                context = select_context(self.resume_text, doc_lists, self.context_token_budget)
+        self._record_context(name, context)
+        return context
+
+    def _improvement_prompt(self, improvement_areas, target_role, context):
+        missing = self._missing_skills()
+        gaps = f"The analysis found these skills missing or weak: {', '.join(missing)}.\n\n" if missing else ""
+        return (
             f"Suggest improvements in these areas: {', '.join(improvement_areas)} "
             f"for making the resume more suitable for a {target_role} role.\n\n"
-            f"Resume content:\n{self.resume_text}"
+            f"{gaps}Resume content:\n{context}"
         )
-        raw_response = llm.invoke(prompt)
-        return {"suggestions": self._normalize_response(raw_response)}
 
-    def get_improved_resume(self, target_role, highlight_skills):
-        llm = EuriaiLangChainLLM(api_key=self.api_key, model="gpt-4.1-nano", temperature=0.5, max_tokens=800)
-        prompt = (
+    def stream_improve_resume(self, improvement_areas, target_role, fresh=False):
+        missing = self._missing_skills()
+        queries = list(improvement_areas) + [f"{target_role} experience"] + missing
+
+        def build_prompt():
+            context = self._resume_context("improve_resume", queries)
+            return self._improvement_prompt(improvement_areas, target_role, context)
+
+        cache_prompt = f"Improve: {list(improvement_areas)} | {target_role} | {missing}"
+        yield from self._stream_response(
+            "improve_resume", cache_prompt, 0.7, IMPROVE_MAX_TOKENS, build_prompt, fresh=fresh
+        )
+
+    def improve_resume(self, improvement_areas, target_role, fresh=False):
+        return {"suggestions": "".join(self.stream_improve_resume(improvement_areas, target_role, fresh=fresh))}
+
+    def _rewrite_prompt(self, target_role, highlight_skills, content, part=None):
+        scope = ""
+        if part:
+            scope = (f" This is part {part[0]} of {part[1]}: rewrite only this part, keep its facts, and "
+                     "do not add a header or summary unless the part already has one.")
+        return (
             f"Rewrite the resume to improve its alignment for a {target_role} role. "
-            f"Highlight these skills: {', '.join(highlight_skills)}.\n\nResume content:\n{self.resume_text}"
+            f"Highlight these skills where the content supports them: {', '.join(highlight_skills)}.{scope}"
+            f"\n\nResume content:\n{content}"
         )
-        raw_response = llm.invoke(prompt)
-        return self._normalize_response(raw_response)
+
+    def _rewrite_sections(self, target_role, highlight_skills, sections):
+        """Rewrite sections concurrently and yield them in order as each becomes available."""
+        llm = self._llm(temperature=0.5, max_tokens=REWRITE_MAX_TOKENS)
+
+        def rewrite(numbered):
+            number, section = numbered
+            prompt = self._rewrite_prompt(target_role, highlight_skills, section, part=(number, len(sections)))
+            with self.trace.stage("llm.rewrite_section"):
+                return self._normalize_response(llm.invoke(prompt)).strip()
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(sections)))
+        futures = [executor.submit(rewrite, numbered) for numbered in enumerate(sections, 1)]
+        try:
+            for number, future in enumerate(futures, 1):
+                yield future.result() + ("\n\n" if number < len(futures) else "")
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def stream_improved_resume(self, target_role, highlight_skills, fresh=False):
+        """Stream a rewritten resume; resumes over the token budget are rewritten section by section in parallel."""
+        cache_prompt = f"Rewrite: {target_role} | {list(highlight_skills)}"
+        trimmed = trim_boilerplate(self.resume_text)
+
+        def build_prompt():
+            self._record_context("get_improved_resume", trimmed)
+            return self._rewrite_prompt(target_role, highlight_skills, trimmed)
+
+        def generate_sections():
+            self._record_context("get_improved_resume", trimmed)
+            sections = split_sections(trimmed, self.context_token_budget)
+            self.trace.count("rewrite_sections", len(sections))
+            return self._rewrite_sections(target_role, highlight_skills, sections)
+
+        over_budget = estimate_tokens(trimmed) > self.context_token_budget
+        yield from self._stream_response(
+            "get_improved_resume", cache_prompt, 0.5, REWRITE_MAX_TOKENS, build_prompt, fresh=fresh,
+            generate=generate_sections if over_budget else None
+        )
+
+    def get_improved_resume(self, target_role, highlight_skills, fresh=False):
+        return "".join(self.stream_improved_resume(target_role, highlight_skills, fresh=fresh))
+
+    def default_highlight_skills(self):
+        """Skills the rewrite highlights unless the user picks others: the weakest from the analysis."""
+        return self._missing_skills()[:MAX_HIGHLIGHT_SKILLS]
+
+    def likely_followups(self, target_role):
+        """Follow-up calls a user is likely to make after an analysis, most likely first.
+
+        Returns ``(name, args, estimated_tokens, stream)`` tuples, where ``stream()`` starts the
+        call. Used for background prefetching; the args match the UI defaults.
+        """
+        areas = list(DEFAULT_IMPROVEMENT_AREAS)
+        skills = self.default_highlight_skills()
+        resume_tokens = estimate_tokens(self.resume_text)
+        sections = -(-resume_tokens // self.context_token_budget)
+        improve_cost = (estimate_tokens(self._improvement_prompt(areas, target_role, ""))
+                        + min(resume_tokens, self.context_token_budget) + IMPROVE_MAX_TOKENS)
+        rewrite_cost = (estimate_tokens(self._rewrite_prompt(target_role, skills, "")) * sections
+                        + resume_tokens + REWRITE_MAX_TOKENS * sections)
+        return [
+            ("improve_resume", (areas, target_role), improve_cost,
+             lambda: self.stream_improve_resume(areas, target_role)),
+            ("get_improved_resume", (target_role, skills), rewrite_cost,
+             lambda: self.stream_improved_resume(target_role, skills)),
+        ]
 
     def cleanup(self):
-        for path in self._temp_files:
-            if os.path.exists(path):
-                os.unlink(path)
-        self._temp_files.clear()
+        """Release everything held for the current resume, e.g. when its session ends."""
+        self.release_index()
+        self.resume_text = self.jd_text = None
+        self._llms = {}
+        self._embedding_client = None
@@ -7,55 +7,21 @@ st.set_page_config(
     layout="wide"
 )
 
+import hashlib
+import os
 import ui
-from agents import ResumeAnalysisAgent
+from agents import DEFAULT_IMPROVEMENT_AREAS, ResumeAnalysisAgent, warm_up
+from roles import ROLE_REQUIREMENTS
+from extraction import EmptyDocumentError, ExtractionError
+from llm_client import get_client
+from metrics import logger, registry
+from prefetch import PrefetchScheduler, prefetch_followups
+from results import get_results_store, jd_target, role_target
+from sessions import get_session_manager
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import atexit
 
-# Role requirements dictionary
-ROLE_REQUIREMENTS = {
-    "AI/ML Engineer": [
-        "Python", "PyTorch", "TensorFlow", "Machine Learning", "Deep Learning",
-        "MLOps", "Scikit-Learn", "NLP", "Computer Vision", "Reinforcement Learning",
-        "Hugging Face", "Data Engineering", "Feature Engineering", "AutoML"
-    ],
-    "Frontend Engineer": [
-        "React", "Vue", "Angular", "HTML5", "CSS3", "JavaScript", "TypeScript",
-        "Next.js", "Svelte", "Bootstrap", "Tailwind CSS", "GraphQL", "Redux",
-        "WebAssembly", "Three.js", "Performance Optimization"
-    ],
-    "Backend Engineer": [
-        "Python", "Java", "Node.js", "REST APIs", "Cloud services", "Kubernetes",
-        "Docker", "GraphQL", "Microservices", "gRPC", "Spring Boot", "Flask",
-        "FastAPI", "SQL & NoSQL Databases", "Redis", "RabbitMQ", "CI/CD"
-    ],
-    "Data Engineer": [
-        "Python", "SQL", "Apache Spark", "Hadoop", "Kafka", "ETL Pipelines",
-        "Airflow", "BigQuery", "Redshift", "Data Warehousing", "Snowflake",
-        "Azure Data Factory", "GCP", "AWS Glue", "DBT"
-    ],
-    "DevOps Engineer": [
-        "Kubernetes", "Docker", "Terraform", "CI/CD", "AWS", "Azure", "GCP",
-        "Jenkins", "Ansible", "Prometheus", "Grafana", "Helm", "Linux Administration",
-        "Networking", "Site Reliability Engineering (SRE)"
-    ],
-    "Full Stack Developer": [
-        "JavaScript", "TypeScript", "React", "Node.js", "Express", "MongoDB",
-        "SQL", "HTML5", "CSS3", "RESTful APIs", "Git", "CI/CD", "Cloud Services",
-        "Responsive Design", "Authentication & Authorization"
-    ],
-    "Product Manager": [
-        "Product Strategy", "User Research", "Agile Methodologies", "Roadmapping",
-        "Market Analysis", "Stakeholder Management", "Data Analysis", "User Stories",
-        "Product Lifecycle", "A/B Testing", "KPI Definition", "Prioritization",
-        "Competitive Analysis", "Customer Journey Mapping"
-    ],
-    "Data Scientist": [
-        "Python", "R", "SQL", "Machine Learning", "Statistics", "Data Visualization",
-        "Pandas", "NumPy", "Scikit-learn", "Jupyter", "Hypothesis Testing",
-        "Experimental Design", "Feature Engineering", "Model Evaluation"
-    ]
-}
-
 # Initialize session state variables
 if 'resume_agent' not in st.session_state:
     st.session_state.resume_agent = None
@@ -66,6 +32,15 @@ if 'resume_analyzed' not in st.session_state:
 if 'analysis_result' not in st.session_state:
     st.session_state.analysis_result = None
 
+if 'target_role' not in st.session_state:
+    st.session_state.target_role = ""
+
+if 'prefetcher' not in st.session_state:
+    st.session_state.prefetcher = PrefetchScheduler()
+
+if 'results_target' not in st.session_state:
+    st.session_state.results_target = None
+
 def setup_agent(config):
     """Set up the resume analysis agent with the provided configuration"""
     if not config["euri_api_key"]:
@@ -76,15 +51,60 @@ def setup_agent(config):
         st.session_state.resume_agent = ResumeAnalysisAgent(api_key=config["euri_api_key"])
     else:
         st.session_state.resume_agent.api_key = config["euri_api_key"]
+        if st.session_state.resume_analyzed and st.session_state.resume_agent.resume_text is None:
+            # The agent was released (e.g. on shutdown); its resume is gone, so ask for a new analysis
+            st.session_state.resume_analyzed = False
+            st.session_state.analysis_result = None
+
+    shared_client(config["euri_api_key"])
+    agent = st.session_state.resume_agent
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        prefetcher = st.session_state.prefetcher
+        session_manager().attach(ctx.session_id, agent, on_release=lambda: prefetcher.reset(0))
+    agent.scoring_mode = config["scoring_mode"]
+    if agent.scoring_mode == "fast":
+        precompute_skill_vectors(config["euri_api_key"])
+    return agent
+
+def session_active(session_id):
+    """Whether a browser session is still connected"""
+    return runtime.exists() and runtime.get_instance().is_active_session(session_id)
+
+@st.cache_resource(show_spinner=False)
+def session_manager():
+    """Memory and disk budgets shared by every session's agent"""
+    return get_session_manager(is_active=session_active)
 
-    return st.session_state.resume_agent
+@st.cache_resource(show_spinner=False)
+def results_store():
+    """Stored screening results of every analysis, for ranking candidates across sessions"""
+    return get_results_store()
 
-def analyze_resume(agent, resume_file, role, custom_jd):
-    """Analyze the resume with the agent"""
+@st.cache_resource(show_spinner=False)
+def warm_start():
+    """Load the analysis dependencies in the background while the first page renders"""
+    if os.environ.get("RECRUITMENT_AGENT_WARM_UP", "1") != "0":
+        return warm_up()
+
+@st.cache_resource(show_spinner=False)
+def shared_client(api_key):
+    """Pooled API client shared by every session, started before the first request needs it"""
+    return get_client(api_key)
+
+@st.cache_resource(show_spinner="Preparing skill vectors...")
+def precompute_skill_vectors(api_key):
+    """Embed all role skills once per process for fast scoring"""
+    return ResumeAnalysisAgent(api_key=api_key).precompute_skill_vectors(ROLE_REQUIREMENTS)
+
+def analyze_resume(agent, resume_file, role, custom_jd, prefetch_budget=0):
+    """Analyze the resume with the agent, then prefetch likely follow-ups within the budget"""
     if not resume_file:
         st.error("⚠️ Please upload a resume.")
         return None
 
+    # Stop background work for the previous resume before starting on this one
+    st.session_state.prefetcher.reset(0)
     try:
         with st.spinner("🔍 Analyzing resume... This may take a minute."):
 
@@ -95,11 +115,40 @@ def analyze_resume(agent, resume_file, role, custom_jd):
             )
             st.session_state.resume_analyzed = True
             st.session_state.analysis_result = result
-            return result
+            st.session_state.target_role = "" if custom_jd else role
+        store_result(resume_file, role, custom_jd, result)
+        if prefetch_budget:
+            prefetch_followups(st.session_state.prefetcher, agent, st.session_state.target_role, prefetch_budget)
+        return result
+    except EmptyDocumentError as e:
+        st.warning(f"⚠️ {e} Is it a scanned image?")
+        return None
+    except ExtractionError as e:
+        st.error(f"❌ Could not read the uploaded file: {e}")
+        return None
     except Exception as e:
+        logger.exception("Resume analysis failed")
         st.error(f"❌ Error analyzing resume: {e}")
         return None
 
+def store_result(resume_file, role, custom_jd, result):
+    """Add the analysis to the results store under its role or JD"""
+    if custom_jd:
+        target, label = jd_target(custom_jd.getvalue()), custom_jd.name
+    else:
+        target, label = role_target(role), role
+    row = {"file": resume_file.name, "digest": hashlib.sha256(resume_file.getvalue()).hexdigest(), **result}
+    try:
+        results_store().add(target, row, label)
+        st.session_state.results_target = (target, label)
+    except Exception:
+        logger.exception("Storing the analysis result failed")
+
+def find_candidates(target, skills, k, cutoff):
+    """Number of stored candidates with the given skill scores, and the top k of them"""
+    store = results_store()
+    return store.count(target, skills=skills), store.top(target, k, skills=skills, cutoff=cutoff)
+
 def safe_call(func, *args, **kwargs):
     """Safely call a function and handle AttributeError"""
     try:
@@ -108,17 +157,34 @@ def safe_call(func, *args, **kwargs):
         st.error("⚠️ This feature is not yet implemented in the backend.")
         return None
     except Exception as e:
+        logger.exception("%s failed", getattr(func, "__name__", func))
         st.error(f"❌ Error: {e}")
         return None
 
+def safe_stream(func, *args, **kwargs):
+    """Like safe_call, for generator functions whose errors surface while streaming"""
+    try:
+        yield from func(*args, **kwargs)
+    except Exception as e:
+        logger.exception("%s failed", getattr(func, "__name__", func))
+        st.error(f"❌ Error: {e}")
+
+def prefetched_or_stream(name, args, fresh, func):
+    """Follow the background prefetch of this call if there is one, otherwise start it now"""
+    if not fresh:
+        stream = st.session_state.prefetcher.follow(name, args)
+        if stream is not None:
+            return safe_stream(lambda: stream)
+    return safe_stream(func, *args, fresh=fresh)
+
 def cleanup():
-    """Clean up resources when the app exits"""
-    if st.session_state.resume_agent:
-        st.session_state.resume_agent.cleanup()
+    """Release every session's resources when the app exits"""
+    get_session_manager().release_all()
 
 atexit.register(cleanup)
 
 def main():
+    warm_start()
     ui.setup_page()
     ui.display_header()
 
@@ -135,17 +201,31 @@ def main():
         with col2:
             if st.button("🔍 Analyze Resume", type="primary"):
                 if agent and uploaded_resume:
-                    analyze_resume(agent, uploaded_resume, role, custom_jd)
+                    analyze_resume(agent, uploaded_resume, role, custom_jd, config["prefetch_budget"])
 
         if st.session_state.analysis_result:
             ui.display_analysis_results(st.session_state.analysis_result)
 
+        if st.session_state.results_target:
+            target, label = st.session_state.results_target
+            ui.candidate_pool_section(
+                label,
+                skill_options=results_store().skill_names(target),
+                find_candidates_func=lambda skills, k, cutoff: find_candidates(target, skills, k, cutoff),
+                cutoff_sweep_func=lambda cutoffs: results_store().cutoff_sweep(target, cutoffs),
+                default_cutoff=agent.cutoff_score if agent else 75
+            )
+
     # Tab 2: Resume Q&A
     with tabs[1]:
         if st.session_state.resume_analyzed and st.session_state.resume_agent:
+            resume_agent = st.session_state.resume_agent
             ui.resume_qa_section(
                 has_resume=True,
-                ask_question_func=lambda q: safe_call(st.session_state.resume_agent.ask_question, q)
+                ask_question_func=lambda q, fresh, sections: safe_stream(
+                    resume_agent.stream_question, q, fresh=fresh, sections=sections
+                ),
+                section_options=resume_agent.resume_sections()
             )
         else:
             st.warning("Please analyze a resume first in the 'Resume Analysis' tab.")
@@ -155,9 +235,8 @@ def main():
         if st.session_state.resume_analyzed and st.session_state.resume_agent:
             ui.interview_questions_section(
                 has_resume=True,
-                generate_questions_func=lambda t, d, n: safe_call(
-                    getattr(st.session_state.resume_agent, "generate_interview_questions", lambda *a, **k: None),
-                    t, d, n
+                generate_questions_func=lambda t, d, n, fresh: safe_call(
+                    st.session_state.resume_agent.generate_interview_questions, t, d, n, fresh=fresh
                 )
             )
         else:
@@ -166,12 +245,15 @@ def main():
     # Tab 4: Resume Improvement
     with tabs[3]:
         if st.session_state.resume_analyzed and st.session_state.resume_agent:
+            prefetch_status = st.session_state.prefetcher.status()
             ui.resume_improvement_section(
                 has_resume=True,
-                improve_resume_func=lambda areas, role: safe_call(
-                    getattr(st.session_state.resume_agent, "improve_resume", lambda *a, **k: None),
-                    areas, role
-                )
+                improve_resume_func=lambda areas, role, fresh: prefetched_or_stream(
+                    "improve_resume", (areas, role), fresh, st.session_state.resume_agent.stream_improve_resume
+                ),
+                default_areas=DEFAULT_IMPROVEMENT_AREAS,
+                default_role=st.session_state.target_role,
+                prefetch_state=prefetch_status.get("improve_resume")
             )
         else:
             st.warning("Please analyze a resume first in the 'Resume Analysis' tab.")
@@ -179,15 +261,25 @@ def main():
     # Tab 5: Improved Resume
     with tabs[4]:
         if st.session_state.resume_analyzed and st.session_state.resume_agent:
+            resume_agent = st.session_state.resume_agent
             ui.improved_resume_section(
                 has_resume=True,
-                get_improved_resume_func=lambda role, skills: safe_call(
-                    getattr(st.session_state.resume_agent, "get_improved_resume", lambda *a, **k: "Feature not implemented."),
-                    role, skills
-                )
+                get_improved_resume_func=lambda role, skills, fresh: prefetched_or_stream(
+                    "get_improved_resume", (role, skills), fresh, resume_agent.stream_improved_resume
+                ),
+                skill_options=resume_agent.extracted_skills,
+                default_skills=resume_agent.default_highlight_skills(),
+                default_role=st.session_state.target_role,
+                prefetch_state=st.session_state.prefetcher.status().get("get_improved_resume")
             )
         else:
             st.warning("Please analyze a resume first in the 'Resume Analysis' tab.")
 
+    # Sidebar panels are drawn last so they include this run's work
+    if agent:
+        ui.display_cache_stats(agent.embedding_cache_stats(), agent.response_cache_stats())
+        ui.display_resource_usage(session_manager().usage())
+        ui.display_metrics(agent.metrics(), registry.render_prometheus(), registry.render_json())
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,456 @@
+"""Offline benchmark for the resume analysis flow.
+
+Runs ``analyze_resume``, ``ask_question`` and ``get_improved_resume`` against
+``stub_backend.py`` on synthetic resumes and job descriptions of several
+sizes, so no API calls are made:
+
+    python benchmark.py --iterations 10 --latency 0.05 --error-rate 0.02
+    python benchmark.py --baseline benchmark_results.json --output new.json
+
+Reports latency percentiles per stage, per operation and for the whole flow,
+throughput, and peak memory, and writes them to a JSON file. With
+``--baseline`` it compares against an earlier results file and exits with
+status 1 if anything got slower than the tolerance allows.
+
+``--compare-chunking`` instead compares the chunking strategies on the same
+resumes: chunks and characters embedded, and how well retrieval finds the
+evidence skill scoring needs.
+
+``--startup`` measures cold start instead: each probe runs in a fresh
+interpreter, timing how long it takes to import the analysis code, to render
+the app's first page and to get a batch worker's first result.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import cache
+import llm_client
+from agents import ResumeAnalysisAgent
+from llm_client import client_stats
+from roles import ROLE_REQUIREMENTS
+from scoring import STRENGTH_SCORE
+from screening import peak_memory_mb
+from stub_backend import start_stub_server
+
+# Work history entries per synthetic resume; JDs grow with the same size names.
+SIZES = {"small": 3, "medium": 10, "large": 30}
+OPERATIONS = ["analyze_resume", "ask_question", "get_improved_resume"]
+CHUNKINGS = ["recursive", "section"]
+QUESTION = "What cloud and container experience does the candidate have?"
+# Cold-start probes run in fresh interpreters by ``run_startup``; each ends by printing its elapsed seconds.
+STARTUP_PROBES = {
+    "import_agents": "import agents",
+    "app_first_render": (
+        "from streamlit.testing.v1 import AppTest\n"
+        "AppTest.from_file('app.py', default_timeout=60).run()"
+    ),
+    "worker_first_result": (
+        "import llm_client\n"
+        "from stub_backend import start_stub_server\n"
+        "server, llm_client.EURI_BASE_URL = start_stub_server()\n"
+        "from benchmark import synthetic_resume\n"
+        "from screening import screen_resumes\n"
+        "path = os.path.join(os.environ['RECRUITMENT_AGENT_CACHE_DIR'], 'resume.txt')\n"
+        "open(path, 'w').write(synthetic_resume('medium', 0))\n"
+        "screen_resumes([path], 'benchmark', output_path=path + '.jsonl', table_path=path + '.csv', workers=1,\n"
+        "               role='Backend Engineer')"
+    ),
+}
+
+_COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Tech", "Hooli"]
+_TITLES = ["Software Engineer", "Senior Engineer", "Data Engineer", "Platform Engineer", "Tech Lead"]
+_VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Automated", "Maintained", "Scaled"]
+_OBJECTS = [
+    "a billing service", "the search pipeline", "internal dashboards", "the deployment workflow",
+    "a recommendation engine", "the reporting warehouse", "customer onboarding", "the mobile API",
+]
+_OUTCOMES = [
+    "cutting latency by 40%", "serving 2M requests a day", "saving $120k a year",
+    "reducing incidents by half", "for a team of 12", "ahead of schedule",
+]
+
+
+def synthetic_resume(size, seed):
+    """A plain-text resume with ``SIZES[size]`` jobs, deterministic for a given seed."""
+    rng = random.Random(f"resume-{size}-{seed}")
+    role = rng.choice(sorted(ROLE_REQUIREMENTS))
+    skills = rng.sample(ROLE_REQUIREMENTS[role], k=min(8, len(ROLE_REQUIREMENTS[role])))
+    lines = [f"Candidate {seed}", f"{role}", "", "Summary",
+             f"{role} with experience in {', '.join(skills[:4])}.", "", "Experience"]
+    for job in range(SIZES[size]):
+        lines.append(f"{rng.choice(_TITLES)} - {rng.choice(_COMPANIES)} ({2024 - job * 2}-{2026 - job * 2})")
+        for _ in range(rng.randint(3, 6)):
+            lines.append(
+                f"- {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} using {rng.choice(skills)}, {rng.choice(_OUTCOMES)}."
+            )
+        lines.append("")
+    lines += ["Skills", ", ".join(skills), "", "Education", "B.Sc. Computer Science"]
+    return "\n".join(lines)
+
+
+def synthetic_jd(size, seed):
+    """A job description listing a role's skills, longer for larger sizes."""
+    rng = random.Random(f"jd-{size}-{seed}")
+    role = rng.choice(sorted(ROLE_REQUIREMENTS))
+    skills = ROLE_REQUIREMENTS[role]
+    lines = [f"Job title: {role}", "", "Requirements"]
+    lines += [f"- Strong experience with {skill}." for skill in skills[:6]]
+    lines += ["", "Nice to have"] + [f"- Familiarity with {skill}." for skill in skills[6:9]]
+    lines += ["", "About the role"]
+    lines += [f"You will work on {rng.choice(_OBJECTS)} {rng.choice(_OUTCOMES)}." for _ in range(SIZES[size])]
+    return "\n".join(lines)
+
+
+def write_case(directory, size, seed):
+    """Write one resume/JD pair to ``directory`` and return their paths."""
+    resume_path = os.path.join(directory, f"resume_{size}_{seed}.txt")
+    jd_path = os.path.join(directory, f"jd_{size}_{seed}.txt")
+    with open(resume_path, "w", encoding="utf-8") as f:
+        f.write(synthetic_resume(size, seed))
+    with open(jd_path, "w", encoding="utf-8") as f:
+        f.write(synthetic_jd(size, seed))
+    return resume_path, jd_path
+
+
+def percentiles(values):
+    """Count, mean, max and p50/p90/p95/p99 (linear interpolation) of a list of seconds."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def at(q):
+        position = (len(ordered) - 1) * q
+        low = int(position)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 6),
+        "p50": round(at(0.50), 6),
+        "p90": round(at(0.90), 6),
+        "p95": round(at(0.95), 6),
+        "p99": round(at(0.99), 6),
+        "max": round(ordered[-1], 6),
+    }
+
+
+def run_flow(api_key, resume_path, jd_path, scoring_mode="batch", track_memory=False):
+    """Run the three user-facing operations on one resume.
+
+    Returns ``(seconds by operation, peak traced KB by operation, stage seconds)``;
+    memory is only measured when tracemalloc is running and ``track_memory`` is set.
+    """
+    agent = ResumeAnalysisAgent(api_key=api_key, scoring_mode=scoring_mode)
+    calls = {
+        "analyze_resume": lambda: agent.analyze_resume(resume_path, custom_jd=jd_path),
+        "ask_question": lambda: agent.ask_question(QUESTION, fresh=True),
+        "get_improved_resume": lambda: agent.get_improved_resume(
+            "Backend Engineer", agent.analysis_result["missing_skills"][:3], fresh=True
+        ),
+    }
+    seconds, memory_kb = {}, {}
+    try:
+        for name, call in calls.items():
+            if track_memory:
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            call()
+            seconds[name] = time.perf_counter() - started
+            if track_memory:
+                memory_kb[name] = round((tracemalloc.get_traced_memory()[1] - baseline) / 1024, 1)
+    finally:
+        agent.cleanup()
+    stages = defaultdict(list)
+    for entry in agent.trace.stages:
+        stages[entry["stage"]].append(entry["seconds"])
+    return seconds, memory_kb, stages
+
+
+def benchmark_size(api_key, directory, size, iterations, concurrency=1, scoring_mode="batch", measure_memory=True):
+    cases = [write_case(directory, size, seed) for seed in range(iterations)]
+    before = client_stats()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        runs = list(executor.map(lambda case: run_flow(api_key, *case, scoring_mode=scoring_mode), cases))
+    elapsed = time.perf_counter() - started
+    after = client_stats()
+
+    operations = defaultdict(list)
+    stages = defaultdict(list)
+    flows = []
+    for seconds, _, run_stages in runs:
+        for name, value in seconds.items():
+            operations[name].append(value)
+        for name, values in run_stages.items():
+            stages[name].extend(values)
+        flows.append(sum(seconds.values()))
+
+    result = {
+        "iterations": iterations,
+        "resume_chars": round(sum(os.path.getsize(r) for r, _ in cases) / len(cases)),
+        "flow": percentiles(flows),
+        "operations": {name: percentiles(operations[name]) for name in OPERATIONS},
+        "stages": {name: percentiles(values) for name, values in sorted(stages.items())},
+        "throughput_flows_per_minute": round(len(runs) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "client": {name: after[name] - before[name] for name in after},
+    }
+
+    if measure_memory:
+        # A separate run under tracemalloc, which would distort the timings above.
+        tracemalloc.start()
+        try:
+            _, memory_kb, _ = run_flow(api_key, *write_case(directory, size, iterations), scoring_mode=scoring_mode,
+                                       track_memory=True)
+        finally:
+            tracemalloc.stop()
+        result["peak_memory_kb"] = memory_kb
+    return result
+
+
+def _compact(text):
+    """The text without blank lines, as PDF extraction often returns it."""
+    return "\n".join(line for line in text.splitlines() if line.strip())
+
+
+def chunking_quality(api_key, size, iterations, chunking, compact=False):
+    """Embedding cost and retrieval quality of one chunking strategy on synthetic resumes.
+
+    The retrieval hit rate is the share of skills a resume mentions that show up in the
+    excerpts retrieved for them during skill scoring. Skill accuracy is the share of the
+    role's skills that batch scoring (without the lexical pre-filter) rates correctly as
+    strengths or not.
+    """
+    chunks = chunk_chars = text_chars = hits = lookups = correct = scored = 0
+    for seed in range(iterations):
+        text = synthetic_resume(size, seed)
+        if compact:
+            text = _compact(text)
+        # The second line of a synthetic resume is its role.
+        skills = ROLE_REQUIREMENTS[text.splitlines()[1]]
+        present = {skill for skill in skills
+                   if re.search(rf"(?<!\w){re.escape(skill.lower())}(?!\w)", text.lower())}
+        upload = io.BytesIO(text.encode("utf-8"))
+        upload.name = "resume.txt"
+        agent = ResumeAnalysisAgent(api_key=api_key, chunking=chunking, lexical_prefilter=False)
+        try:
+            result = agent.analyze_resume(upload, role_requirements=skills)
+            for skill in present:
+                context = agent._retrieve_context(agent.rag_vectorstore, [skill], sections=agent.skill_sections)
+                hits += skill.lower() in context.lower()
+                lookups += 1
+            for skill, score in result["skill_scores"].items():
+                correct += (score >= STRENGTH_SCORE) == (skill in present)
+                scored += 1
+        finally:
+            agent.cleanup()
+        counters = agent.metrics()["counters"]
+        chunks += counters["chunks"]
+        chunk_chars += counters["chunk_chars"]
+        text_chars += len(text)
+    return {
+        "chunks_per_resume": round(chunks / iterations, 2),
+        "embedded_chars_per_text_char": round(chunk_chars / text_chars, 3),
+        "retrieval_hit_rate": round(hits / lookups, 4) if lookups else None,
+        "skill_accuracy": round(correct / scored, 4) if scored else None,
+    }
+
+
+def compare(results, baseline, tolerance=0.2):
+    """List the p50/p95 latencies and throughputs that regressed by more than ``tolerance``."""
+    regressions = []
+    for size, current in results["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if not previous:
+            continue
+        pairs = [(f"{size} flow", current["flow"], previous["flow"])]
+        pairs += [(f"{size} {name}", current["operations"][name], previous["operations"].get(name, {}))
+                  for name in OPERATIONS]
+        for label, now, before in pairs:
+            for stat in ("p50", "p95"):
+                if before.get(stat) and now.get(stat, 0) > before[stat] * (1 + tolerance):
+                    regressions.append(f"{label} {stat}: {before[stat]:.3f}s -> {now[stat]:.3f}s")
+        now_rate, before_rate = current["throughput_flows_per_minute"], previous.get("throughput_flows_per_minute")
+        if before_rate and now_rate < before_rate * (1 - tolerance):
+            regressions.append(f"{size} throughput: {before_rate} -> {now_rate} flows/min")
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextmanager
+def _stub_environment(**behaviour):
+    """Start a stub backend with fresh caches in a temporary directory; yields ``(server, directory)``."""
+    server, base_url = start_stub_server(**behaviour)
+    llm_client.EURI_BASE_URL = base_url
+    with tempfile.TemporaryDirectory(prefix="recruitment-benchmark-") as directory:
+        # Fresh caches so every run starts cold and runs are comparable.
+        cache.CACHE_DIR = os.path.join(directory, "cache")
+        try:
+            yield server, directory
+        finally:
+            server.shutdown()
+
+
+def _run_info(config):
+    return {
+        "version": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": config,
+    }
+
+
+def run_benchmark(sizes=tuple(SIZES), iterations=5, concurrency=1, scoring_mode="batch", latency=0.0, jitter=0.0,
+                  token_latency=0.0, error_rate=0.0, seed=0, measure_memory=True):
+    """Start a stub backend with isolated caches, benchmark each size and return the results dict."""
+    with _stub_environment(latency=latency, jitter=jitter, token_latency=token_latency, error_rate=error_rate,
+                           seed=seed) as (server, directory):
+        results = _run_info({
+            "iterations": iterations, "concurrency": concurrency, "scoring_mode": scoring_mode,
+            "latency": latency, "jitter": jitter, "token_latency": token_latency,
+            "error_rate": error_rate, "seed": seed,
+        })
+        results["sizes"] = {}
+        for size in sizes:
+            results["sizes"][size] = benchmark_size(
+                "benchmark", directory, size, iterations, concurrency, scoring_mode, measure_memory
+            )
+        results["stub"] = {"requests": server.request_count, "injected_errors": server.error_count}
+        results["peak_rss_mb"] = peak_memory_mb()
+        return results
+
+
+def run_chunking_comparison(sizes=tuple(SIZES), iterations=5):
+    """Compare the chunking strategies on each size, with and without blank lines between entries."""
+    with _stub_environment():
+        results = _run_info({"iterations": iterations, "chunkings": CHUNKINGS})
+        results["chunking"] = {
+            size: {
+                layout: {chunking: chunking_quality("benchmark", size, iterations, chunking, compact=compact)
+                         for chunking in CHUNKINGS}
+                for layout, compact in (("blank_lines", False), ("compact", True))
+            }
+            for size in sizes
+        }
+        return results
+
+
+def _startup_seconds(probe, directory):
+    """Run one probe in a fresh interpreter with empty caches and return its elapsed seconds."""
+    code = f"import os, time\nstarted = time.perf_counter()\n{probe}\nprint(time.perf_counter() - started)"
+    env = dict(os.environ, RECRUITMENT_AGENT_CACHE_DIR=tempfile.mkdtemp(dir=directory),
+               RECRUITMENT_AGENT_RESULTS_DB=os.path.join(directory, "results.sqlite3"))
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def run_startup(repeats=5, probes=tuple(STARTUP_PROBES)):
+    """Time each cold-start probe ``repeats`` times in fresh interpreters and return the results dict."""
+    with tempfile.TemporaryDirectory(prefix="recruitment-benchmark-") as directory:
+        results = _run_info({"repeats": repeats, "probes": list(probes)})
+        results["startup"] = {
+            name: percentiles([_startup_seconds(STARTUP_PROBES[name], directory) for _ in range(repeats)])
+            for name in probes
+        }
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analysis flow against a local stub backend.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--iterations", type=int, default=5, help="Resumes analyzed per size.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Flows run at the same time.")
+    parser.add_argument("--scoring-mode", choices=["batch", "per_skill", "fast"], default="batch")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per API request.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency, up to this many seconds.")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Simulated seconds between streamed chunks.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API requests that fail with 503.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run for peak memory.")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline.")
+    parser.add_argument("--compare-chunking", action="store_true",
+                        help="Compare the chunking strategies' embedding cost and retrieval quality instead.")
+    parser.add_argument("--startup", action="store_true",
+                        help="Measure cold-start times in fresh interpreters instead (--iterations runs each).")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        results = run_startup(args.iterations)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        for name, stats in results["startup"].items():
+            print(f"{name:<20} p50 {stats['p50']:.3f}s max {stats['max']:.3f}s")
+        print(f"Results -> {args.output}")
+        return
+
+    if args.compare_chunking:
+        results = run_chunking_comparison(args.sizes, args.iterations)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        for size, layouts in results["chunking"].items():
+            for layout, strategies in layouts.items():
+                for chunking, stats in strategies.items():
+                    print(f"{size:>6} {layout:<11} {chunking:<9}: {stats['chunks_per_resume']:>5} chunks, "
+                          f"{stats['embedded_chars_per_text_char']:.2f}x text embedded, "
+                          f"retrieval hit rate {stats['retrieval_hit_rate']:.0%}, "
+                          f"skill accuracy {stats['skill_accuracy']:.0%}")
+        print(f"Results -> {args.output}")
+        return
+
+    results = run_benchmark(
+        args.sizes, args.iterations, args.concurrency, args.scoring_mode, args.latency, args.jitter,
+        args.token_latency, args.error_rate, args.seed, measure_memory=not args.no_memory
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    for size, result in results["sizes"].items():
+        flow = result["flow"]
+        print(f"{size:>6}: flow p50 {flow['p50']:.3f}s p95 {flow['p95']:.3f}s, "
+              f"{result['throughput_flows_per_minute']} flows/min, {result['client']['retries']} retries")
+        for name in OPERATIONS:
+            stats = result["operations"][name]
+            memory = result.get("peak_memory_kb", {}).get(name)
+            memory = f", peak {memory:.0f} KB" if memory is not None else ""
+            print(f"        {name:<20} p50 {stats['p50']:.3f}s p95 {stats['p95']:.3f}s{memory}")
+    print(f"Results -> {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
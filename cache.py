@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from metrics import registry
+
+CACHE_DIR = os.environ.get(
+    "RECRUITMENT_AGENT_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "mwasiq-recruitment-agent")
+)
+
+# Embeddings are stored as float32, which takes about 8.3 KB on disk per 1536-dimension
+# vector with its key and index entry, so the default cap keeps the embedding cache near
+# 500 MB: within the default 1024 MB disk budget (see sessions.py), with room for the
+# response cache.
+MAX_EMBEDDINGS = int(os.environ.get("RECRUITMENT_AGENT_MAX_EMBEDDINGS", 60_000))
+# Bumped when the stored vector format changes; older entries are dropped on open.
+_EMBEDDING_FORMAT = 1
+
+# SQLite caps the number of bound parameters per statement.
+_SQL_BATCH = 500
+
+
+def _batched(items, size=_SQL_BATCH):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _file_bytes(path):
+    """Size of a SQLite database including its journal files."""
+    return sum(os.path.getsize(p) for p in (path, path + "-wal", path + "-journal") if os.path.exists(p))
+
+
+def _shrink(conn, table, fraction):
+    """Delete the least recently used ``fraction`` of ``table`` and give the space back to the filesystem."""
+    count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    remove = max(1, int(count * fraction)) if count else 0
+    if remove:
+        conn.execute(
+            f"DELETE FROM {table} WHERE key IN (SELECT key FROM {table} ORDER BY last_used ASC LIMIT ?)", (remove,)
+        )
+        conn.commit()
+        conn.execute("VACUUM")
+    return remove
+
+
+class EmbeddingCache:
+    """Persistent embedding store keyed by a hash of (model, text), bounded with LRU eviction."""
+
+    def __init__(self, path=None, max_entries=MAX_EMBEDDINGS):
+        self.path = path or os.path.join(CACHE_DIR, "embeddings.sqlite3")
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != _EMBEDDING_FORMAT:
+            # Caches written before vectors were stored as float32 hold float64 blobs.
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.execute(f"PRAGMA user_version = {_EMBEDDING_FORMAT}")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model, text):
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Return {key: vector} for the keys present in the cache and mark them as recently used."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for batch in _batched(keys):
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store {key: vector} pairs, evicting the least recently used entries beyond max_entries."""
+        now = time.time()
+        rows = [(key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def disk_bytes(self):
+        return _file_bytes(self.path)
+
+    def shrink(self, fraction=0.25):
+        """Drop the least recently used fraction of entries; returns how many were removed."""
+        with self._lock:
+            return _shrink(self._conn, "embeddings", fraction)
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+            }
+
+
+class ResponseCache:
+    """LLM response cache: an in-memory LRU in front of a SQLite tier, with TTL expiry on both."""
+
+    def __init__(self, path=None, max_memory_entries=512, max_disk_entries=20_000, ttl=7 * 24 * 3600):
+        self.path = path or os.path.join(CACHE_DIR, "responses.sqlite3")
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+        self._conn.commit()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model, temperature, max_tokens, prompt, resume_hash=None):
+        # Whitespace and case differences should not defeat the cache.
+        normalized = " ".join(prompt.split()).casefold()
+        raw = json.dumps([model, temperature, max_tokens, normalized, resume_hash])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._remember(key, row[1], row[0])
+            self.disk_hits += 1
+            return row[0]
+
+    def put(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now)
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_disk_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_disk_entries,)
+                )
+            self._conn.commit()
+
+    def _remember(self, key, expires_at, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def disk_bytes(self):
+        return _file_bytes(self.path)
+
+    def shrink(self, fraction=0.25):
+        """Drop expired entries and the least recently used fraction of the rest from disk."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            return _shrink(self._conn, "responses", fraction)
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "hits": hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """Return the process-wide embedding cache, creating it on first use."""
+    global _embedding_cache
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache()
+            registry.register_collector("embedding_cache", _embedding_cache.stats)
+        return _embedding_cache
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide LLM response cache, creating it on first use."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+            registry.register_collector("response_cache", _response_cache.stats)
+        return _response_cache
+
+
+def __getattr__(name):
+    # CachedEmbeddings subclasses a LangChain interface, which is slow to import; load it on first use.
+    if name == "CachedEmbeddings":
+        import langchain_adapters
+        return langchain_adapters.CachedEmbeddings
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
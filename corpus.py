@@ -0,0 +1,194 @@
+"""Persistent multi-candidate resume index.
+
+Each candidate's resume is chunked and embedded with the agent's usual
+pipeline, and the normalized chunk vectors go into one on-disk FAISS index
+(``IndexIDMap2`` over inner product) keyed by chunk id. Chunk text and the
+candidate each chunk belongs to live in a SQLite table next to it, so a
+candidate can be replaced or removed without rebuilding the index. The index
+is opened memory-mapped with ``IO_FLAG_MMAP_IFC`` (faiss >= 1.11), which maps
+the flat vectors in place, so opening and searching it does not load the
+corpus into process memory; it is only read fully into memory on the first
+change.
+
+SQLite changes are committed at once, while the index is only written by
+``save()``. If the process stops in between, opening the corpus brings the
+index back in line: vectors of deleted chunks are dropped and stored chunks
+missing from the index are embedded again.
+
+Example:
+    corpus = agent.candidate_corpus()
+    corpus.upsert("cand-42", resume_text, {"name": "Jane Doe"})
+    corpus.save()
+    corpus.top_candidates(jd_text, k=10)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+import faiss
+import numpy as np
+
+from cache import CACHE_DIR
+from metrics import logger
+from scoring import normalize_rows
+
+
+class CandidateCorpus:
+    def __init__(self, embeddings, split_text, path=None):
+        self.embeddings = embeddings
+        self.split_text = split_text
+        self.path = path or os.path.join(CACHE_DIR, "corpus")
+        os.makedirs(self.path, exist_ok=True)
+        self.index_path = os.path.join(self.path, "index.faiss")
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(self.path, "meta.sqlite3"), check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS candidates ("
+            "candidate_id TEXT PRIMARY KEY, content_hash TEXT NOT NULL, metadata TEXT NOT NULL DEFAULT '{}');"
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "chunk_id INTEGER PRIMARY KEY AUTOINCREMENT, candidate_id TEXT NOT NULL, text TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_chunks_candidate ON chunks (candidate_id);"
+        )
+        self._index = None
+        self._mmapped = False
+        if os.path.exists(self.index_path):
+            self._index = faiss.read_index(self.index_path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+            self._mmapped = True
+        self._reconcile()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def _writable_index(self, dim):
+        if self._index is None:
+            self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        elif self._mmapped:
+            self._index = faiss.read_index(self.index_path)
+            self._mmapped = False
+        return self._index
+
+    def _reconcile(self):
+        """Make the index match the committed chunks after changes that were never saved."""
+        indexed = set(faiss.vector_to_array(self._index.id_map).tolist()) if self._index is not None else set()
+        stored = dict(self._conn.execute("SELECT chunk_id, candidate_id FROM chunks"))
+        orphaned = indexed - stored.keys()
+        missing = sorted(stored.keys() - indexed)
+        if not orphaned and not missing:
+            return
+        logger.warning("Corpus index at %s was not saved after its last changes; repairing %d orphaned and "
+                       "%d missing chunks", self.index_path, len(orphaned), len(missing))
+        with self._lock:
+            if orphaned:
+                self._writable_index(self._index.d).remove_ids(np.array(sorted(orphaned), dtype=np.int64))
+            if missing:
+                placeholders = ",".join("?" * len(missing))
+                texts = dict(self._conn.execute(
+                    f"SELECT chunk_id, text FROM chunks WHERE chunk_id IN ({placeholders})", missing
+                ))
+                vectors = normalize_rows(self.embeddings.embed_documents([texts[i] for i in missing]))
+                self._writable_index(vectors.shape[1]).add_with_ids(vectors, np.array(missing, dtype=np.int64))
+            self.save()
+
+    def _chunk_ids(self, candidate_id):
+        rows = self._conn.execute(
+            "SELECT chunk_id FROM chunks WHERE candidate_id = ? ORDER BY chunk_id", (candidate_id,)
+        )
+        return np.array([row[0] for row in rows], dtype=np.int64)
+
+    def upsert(self, candidate_id, resume_text, metadata=None):
+        """Add or replace a candidate. Returns False when the stored resume is already identical."""
+        content_hash = hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM candidates WHERE candidate_id = ?", (candidate_id,)
+            ).fetchone()
+            if row and row[0] == content_hash:
+                if metadata is not None:
+                    self._conn.execute(
+                        "UPDATE candidates SET metadata = ? WHERE candidate_id = ?", (json.dumps(metadata), candidate_id)
+                    )
+                    self._conn.commit()
+                return False
+
+        chunks = self.split_text(resume_text)
+        vectors = normalize_rows(self.embeddings.embed_documents(chunks)) if chunks else None
+
+        with self._lock:
+            self._remove_chunks(candidate_id)
+            if chunks:
+                index = self._writable_index(vectors.shape[1])
+                self._conn.executemany(
+                    "INSERT INTO chunks (candidate_id, text) VALUES (?, ?)", [(candidate_id, c) for c in chunks]
+                )
+                ids = self._chunk_ids(candidate_id)
+                index.add_with_ids(vectors, ids)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO candidates (candidate_id, content_hash, metadata) VALUES (?, ?, ?)",
+                (candidate_id, content_hash, json.dumps(metadata or {}))
+            )
+            self._conn.commit()
+        return True
+
+    def _remove_chunks(self, candidate_id):
+        ids = self._chunk_ids(candidate_id)
+        if len(ids) and self._index is not None:
+            self._writable_index(self._index.d).remove_ids(ids)
+        self._conn.execute("DELETE FROM chunks WHERE candidate_id = ?", (candidate_id,))
+
+    def remove(self, candidate_id):
+        with self._lock:
+            self._remove_chunks(candidate_id)
+            deleted = self._conn.execute("DELETE FROM candidates WHERE candidate_id = ?", (candidate_id,)).rowcount
+            self._conn.commit()
+        return bool(deleted)
+
+    def save(self):
+        """Write the index to disk atomically; the SQLite side is committed on every change.
+
+        Changes not saved before the process stops are repaired when the corpus is next opened.
+        """
+        with self._lock:
+            if self._index is None or self._mmapped:
+                return
+            tmp_path = self.index_path + ".tmp"
+            faiss.write_index(self._index, tmp_path)
+            os.replace(tmp_path, self.index_path)
+
+    def top_candidates(self, query, k=10, chunks_per_candidate=5):
+        """Rank candidates for a JD or question by their best-matching chunk.
+
+        Returns dicts with ``candidate_id``, ``score`` (cosine similarity), ``excerpt`` and ``metadata``.
+        """
+        if self._index is None or self._index.ntotal == 0:
+            return []
+        query_vector = normalize_rows([self.embeddings.embed_query(query)])
+        with self._lock:
+            depth = min(self._index.ntotal, k * chunks_per_candidate)
+            scores, ids = self._index.search(query_vector, depth)
+
+            best = {}
+            for score, chunk_id in zip(scores[0], ids[0]):
+                if chunk_id < 0:
+                    continue
+                row = self._conn.execute(
+                    "SELECT candidate_id, text FROM chunks WHERE chunk_id = ?", (int(chunk_id),)
+                ).fetchone()
+                if row and row[0] not in best:
+                    best[row[0]] = (float(score), row[1])
+                if len(best) == k:
+                    break
+
+            results = []
+            for candidate_id, (score, excerpt) in best.items():
+                row = self._conn.execute(
+                    "SELECT metadata FROM candidates WHERE candidate_id = ?", (candidate_id,)
+                ).fetchone()
+                results.append({
+                    "candidate_id": candidate_id,
+                    "score": score,
+                    "excerpt": excerpt,
+                    "metadata": json.loads(row[0]) if row else {},
+                })
+            return results
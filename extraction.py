@@ -0,0 +1,126 @@
+"""Resume and JD text extraction with size limits and explicit failures.
+
+PDF pages are yielded lazily, straight from the uploaded buffer, and large
+documents can be spread across a process pool. Unreadable files raise
+``ExtractionError``; files that read fine but contain no text raise
+``EmptyDocumentError``, so callers can tell the two apart.
+"""
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+MAX_PDF_PAGES = 50
+MAX_FILE_BYTES = 20 * 1024 * 1024
+# Below this many pages, process start-up costs more than it saves.
+PARALLEL_PAGE_THRESHOLD = 16
+
+
+class ExtractionError(Exception):
+    """The file could not be read (corrupt, encrypted, unsupported or over the limits)."""
+
+
+class EmptyDocumentError(ValueError):
+    """The file was read successfully but contains no extractable text."""
+
+
+def file_size(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if hasattr(source, "getbuffer"):
+        return source.getbuffer().nbytes
+    position = source.tell()
+    size = source.seek(0, os.SEEK_END)
+    source.seek(position)
+    return size
+
+
+def check_size(source, max_bytes=MAX_FILE_BYTES):
+    try:
+        size = file_size(source)
+    except OSError as e:
+        raise ExtractionError(f"Could not read file: {e}") from e
+    if size > max_bytes:
+        raise ExtractionError(f"File is {size / 1024 / 1024:.1f} MB; the limit is {max_bytes / 1024 / 1024:.0f} MB.")
+
+
+def _open_pdf(source):
+    import PyPDF2
+    if hasattr(source, "seek"):
+        # Uploaded files are BytesIO objects already; read them in place instead of copying.
+        source.seek(0)
+    reader = PyPDF2.PdfReader(source)
+    if reader.is_encrypted and not reader.decrypt(""):
+        raise ExtractionError("PDF is password protected.")
+    return reader
+
+
+def _extract_page_range(source, start, stop):
+    reader = _open_pdf(source)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(source, max_pages=MAX_PDF_PAGES, max_bytes=MAX_FILE_BYTES, workers=None):
+    """Yield the text of each PDF page in order.
+
+    ``source`` is a path or a file-like object. With ``workers`` > 1, documents
+    of at least ``PARALLEL_PAGE_THRESHOLD`` pages are split into page ranges
+    extracted in a process pool.
+    """
+    check_size(source, max_bytes)
+    try:
+        reader = _open_pdf(source)
+        page_count = len(reader.pages)
+    except ExtractionError:
+        raise
+    except Exception as e:
+        raise ExtractionError(f"Could not open PDF: {e}") from e
+    if page_count > max_pages:
+        raise ExtractionError(f"PDF has {page_count} pages; the limit is {max_pages}.")
+
+    if workers and workers > 1 and page_count >= PARALLEL_PAGE_THRESHOLD:
+        # Worker processes need their own copy of in-memory uploads; paths are reopened directly.
+        payload = source if isinstance(source, (str, os.PathLike)) else _as_stream(source)
+        step = -(-page_count // workers)
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_extract_page_range, payload, start, stop) for start, stop in ranges]
+                for future in futures:
+                    yield from future.result()
+        except ExtractionError:
+            raise
+        except Exception as e:
+            raise ExtractionError(f"Could not extract PDF pages: {e}") from e
+        return
+
+    for number, page in enumerate(reader.pages, 1):
+        try:
+            text = page.extract_text() or ""
+        except Exception as e:
+            raise ExtractionError(f"Could not extract page {number}: {e}") from e
+        yield text
+
+
+def _as_stream(source):
+    source.seek(0)
+    return io.BytesIO(source.read())
+
+
+def extract_pdf_text(source, **limits):
+    return "\n".join(text for text in iter_pdf_pages(source, **limits) if text).strip()
+
+
+def extract_txt_text(source, max_bytes=MAX_FILE_BYTES):
+    check_size(source, max_bytes)
+    try:
+        if hasattr(source, "getbuffer"):
+            return str(source.getbuffer(), "utf-8")
+        if hasattr(source, "read"):
+            source.seek(0)
+            data = source.read()
+            return data.decode("utf-8") if isinstance(data, bytes) else data
+        with open(source, "r", encoding="utf-8") as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        raise ExtractionError(f"Could not read text file: {e}") from e
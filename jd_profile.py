@@ -0,0 +1,119 @@
+"""Structured job description profiles.
+
+A profile lists the skills a JD asks for, split into required and
+nice-to-have, each with a 1-3 weight:
+
+    {"jd_hash": "...",
+     "required": [{"skill": "Python", "weight": 3}, ...],
+     "nice_to_have": [{"skill": "Terraform", "weight": 1}, ...]}
+
+Profiles are cached by JD content, so screening many candidates against the
+same JD extracts it once.
+"""
+import hashlib
+import json
+import re
+
+from metrics import logger
+from roles import ROLE_REQUIREMENTS
+from scoring import get_skill_matcher
+
+PROFILE_TTL = 30 * 24 * 3600
+MAX_PROFILE_SKILLS = 20
+# Nice-to-have skills count for this fraction of their weight in the overall score.
+NICE_TO_HAVE_FACTOR = 0.5
+
+
+def jd_hash(jd_text):
+    return hashlib.sha256(" ".join(jd_text.split()).encode("utf-8")).hexdigest()
+
+
+def profile_prompt(jd_text):
+    return (
+        "Extract the skills this job description asks for. Use short canonical skill names "
+        "(e.g. \"Python\", \"Kubernetes\", \"Stakeholder Management\"). Give each a weight from 1 to 3, "
+        f"where 3 is a core requirement. List at most {MAX_PROFILE_SKILLS} skills in total.\n\n"
+        f"Job description:\n{jd_text}\n\n"
+        "Respond with JSON only:\n"
+        '{"required": [{"skill": "<name>", "weight": <1-3>}], '
+        '"nice_to_have": [{"skill": "<name>", "weight": <1-3>}]}'
+    )
+
+
+def _parse_entries(entries, seen):
+    parsed = []
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, str):
+            entry = {"skill": entry}
+        if not isinstance(entry, dict):
+            continue
+        skill = " ".join(str(entry.get("skill", "")).split())
+        if not skill or skill.casefold() in seen:
+            continue
+        try:
+            weight = int(round(float(entry.get("weight", 1))))
+        except (TypeError, ValueError):
+            weight = 1
+        seen.add(skill.casefold())
+        parsed.append({"skill": skill, "weight": min(max(weight, 1), 3)})
+    return parsed
+
+
+def parse_profile(text):
+    """Parse a model response into ``(required, nice_to_have)`` lists, or None if it is unusable."""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    seen = set()
+    required = _parse_entries(data.get("required"), seen)
+    nice_to_have = _parse_entries(data.get("nice_to_have"), seen)
+    if not required and not nice_to_have:
+        return None
+    return required[:MAX_PROFILE_SKILLS], nice_to_have[:max(0, MAX_PROFILE_SKILLS - len(required))]
+
+
+def lexical_profile(jd_text):
+    """Fallback profile: every known role skill mentioned in the JD, as a required skill of weight 1."""
+    known = list(dict.fromkeys(skill for skills in ROLE_REQUIREMENTS.values() for skill in skills))
+    mentions = get_skill_matcher(known).scan(jd_text)
+    required = [{"skill": skill, "weight": 1} for skill, count in mentions.items() if count]
+    return required[:MAX_PROFILE_SKILLS], []
+
+
+def profile_skills(profile):
+    return [entry["skill"] for entry in profile["required"] + profile["nice_to_have"]]
+
+
+def profile_weights(profile):
+    weights = {entry["skill"]: float(entry["weight"]) for entry in profile["required"]}
+    for entry in profile["nice_to_have"]:
+        weights[entry["skill"]] = entry["weight"] * NICE_TO_HAVE_FACTOR
+    return weights
+
+
+def build_profile(jd_text, complete, cache, cache_key):
+    """Return the JD's profile from ``cache``, or extract it with ``complete(prompt)`` and store it."""
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return json.loads(cached)
+    try:
+        parsed = parse_profile(complete(profile_prompt(jd_text)))
+        if parsed is None:
+            logger.warning("The JD profile response could not be parsed, using the lexical profile")
+    except Exception as e:
+        logger.warning("Extracting the JD profile failed, using the lexical profile: %s", e)
+        parsed = None
+    # The fallback is used for this analysis only; the next one asks the model again.
+    required, nice_to_have = parsed or lexical_profile(jd_text)
+    if not required and not nice_to_have:
+        raise ValueError("No skills could be identified in the job description.")
+    profile = {"jd_hash": jd_hash(jd_text), "required": required, "nice_to_have": nice_to_have}
+    if parsed is not None:
+        cache.put(cache_key, json.dumps(profile), ttl=PROFILE_TTL)
+    return profile
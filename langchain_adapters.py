@@ -0,0 +1,98 @@
+"""LangChain adapters for the shared API client and the embedding cache.
+
+Kept apart from ``llm_client.py`` and ``cache.py`` because importing
+langchain_core takes most of a second; ``ResumeAnalysisAgent`` imports this
+module when it first needs an LLM or embeddings handle, and ``agents.warm_up``
+can load it in the background ahead of time.
+"""
+from typing import Any
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from pydantic import Field
+
+from cache import get_embedding_cache
+from llm_client import get_client
+
+
+class EuriLLM(LLM):
+    """LangChain LLM backed by the shared ``EuriClient``."""
+
+    api_key: str = Field(repr=False)
+    model: str = "gpt-4.1-nano"
+    temperature: float = 0.7
+    max_tokens: int = 300
+    # Optional metrics.Trace that records requests, token estimates and retries.
+    observer: Any = Field(default=None, exclude=True, repr=False)
+
+    @property
+    def _llm_type(self):
+        return "euriai"
+
+    @property
+    def _identifying_params(self):
+        return {"model": self.model, "temperature": self.temperature, "max_tokens": self.max_tokens}
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        text = get_client(self.api_key).complete(
+            prompt, self.model, self.temperature, self.max_tokens, stop, observer=self.observer
+        )
+        if self.observer is not None:
+            self.observer.record_llm(prompt, text)
+        return text
+
+    def _stream(self, prompt, stop=None, run_manager=None, **kwargs):
+        parts = []
+        client = get_client(self.api_key)
+        for text in client.stream(prompt, self.model, self.temperature, self.max_tokens, stop, observer=self.observer):
+            parts.append(text)
+            chunk = GenerationChunk(text=text)
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+        if self.observer is not None:
+            self.observer.record_llm(prompt, "".join(parts))
+
+
+class EuriEmbeddings(Embeddings):
+    """LangChain embeddings backed by the shared ``EuriClient``."""
+
+    def __init__(self, api_key, model="text-embedding-3-small", observer=None):
+        self.api_key = api_key
+        self.model = model
+        self.observer = observer
+
+    def embed_documents(self, texts):
+        if self.observer is not None:
+            self.observer.record_embedding(texts)
+        return get_client(self.api_key).embed(texts, self.model, observer=self.observer)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends texts missing from the cache to the underlying model."""
+
+    def __init__(self, embeddings, model, cache=None, observer=None):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache or get_embedding_cache()
+        self.observer = observer
+
+    def embed_documents(self, texts):
+        keys = [self.cache.key(self.model, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if self.observer is not None:
+            self.observer.count("embedding_cache_hits", len(set(keys)) - len(missing))
+            self.observer.count("embedding_cache_misses", len(missing))
+        if missing:
+            fresh = dict(zip(missing, self.embeddings.embed_documents(list(missing.values()))))
+            self.cache.put_many(fresh)
+            vectors.update(fresh)
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
@@ -0,0 +1,343 @@
+"""Shared client for the Euriai chat and embedding endpoints.
+
+``AsyncEuriClient`` keeps one pooled HTTP connection pool per API key, paces
+requests with a token bucket per model, retries throttling and transient
+errors with jittered exponential backoff, and coalesces identical requests
+that are already in flight. ``EuriClient`` runs it on a background event loop
+and exposes a blocking facade. ``EuriLLM`` / ``EuriEmbeddings`` adapt it to the
+LangChain interfaces used by ``ResumeAnalysisAgent``; they live in
+``langchain_adapters.py`` and are only imported when first used.
+
+Point ``EURI_BASE_URL`` at ``stub_backend.py`` to run without the real API,
+and run ``python llm_client.py --check`` with a key to check the chat,
+streaming and embedding responses of the real one.
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+import httpx
+
+from metrics import registry
+
+# The euriai SDK (1.0.x) posts to <base>/chat/completions and <base>/embeddings under this base.
+EURI_BASE_URL = os.environ.get("EURI_BASE_URL", "https://api.euron.one/api/v1/euri")
+
+# Requests per second and burst size for each model.
+DEFAULT_RATE_LIMITS = {
+    "gpt-4.1-nano": (8.0, 16),
+    "text-embedding-3-small": (10.0, 20),
+}
+FALLBACK_RATE_LIMIT = (5.0, 10)
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class RetryableStatusError(Exception):
+    def __init__(self, response):
+        super().__init__(f"Euriai API returned HTTP {response.status_code}")
+        self.response = response
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, holding at most ``capacity``."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncEuriClient:
+    def __init__(self, api_key, base_url=None, max_connections=20, rate_limits=None, max_retries=4,
+                 backoff=0.5, max_backoff=20.0, timeout=60.0):
+        self.base_url = (base_url or EURI_BASE_URL).rstrip("/")
+        self.rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._http = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+        self._buckets = {}
+        self._inflight = {}
+        self.stats = {"requests": 0, "retries": 0, "coalesced": 0, "errors": 0}
+
+    def _bucket(self, model):
+        if model not in self._buckets:
+            rate, capacity = self.rate_limits.get(model, FALLBACK_RATE_LIMIT)
+            self._buckets[model] = TokenBucket(rate, capacity)
+        return self._buckets[model]
+
+    def _retry_delay(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        # Full jitter keeps concurrent callers from retrying in lockstep.
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def _post(self, path, payload, observer=None):
+        bucket = self._bucket(payload["model"])
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            self.stats["requests"] += 1
+            response = None
+            try:
+                response = await self._http.post(f"{self.base_url}{path}", json=payload)
+                if response.status_code in RETRYABLE_STATUS:
+                    raise RetryableStatusError(response)
+                response.raise_for_status()
+                return response.json()
+            except (httpx.TransportError, RetryableStatusError) as e:
+                if attempt == self.max_retries:
+                    self.stats["errors"] += 1
+                    raise
+                self.stats["retries"] += 1
+                if observer is not None:
+                    observer.count("retries")
+                await asyncio.sleep(self._retry_delay(attempt, getattr(e, "response", response)))
+            except httpx.HTTPError:
+                self.stats["errors"] += 1
+                raise
+
+    async def _coalesce(self, key, factory):
+        """Share one request between identical concurrent callers."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def complete(self, prompt, model="gpt-4.1-nano", temperature=0.7, max_tokens=300, stop=None, observer=None):
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if stop:
+            payload["stop"] = list(stop)
+
+        async def request():
+            data = await self._post("/chat/completions", payload, observer)
+            return data.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+        key = ("chat", model, temperature, max_tokens, tuple(stop or ()), prompt)
+        return await self._coalesce(key, request)
+
+    async def stream(self, prompt, model="gpt-4.1-nano", temperature=0.7, max_tokens=300, stop=None, observer=None):
+        """Yield completion text as it arrives. Retries only happen before the first token."""
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+        if stop:
+            payload["stop"] = list(stop)
+        bucket = self._bucket(model)
+        yielded = False
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            self.stats["requests"] += 1
+            try:
+                async with self._http.stream("POST", f"{self.base_url}/chat/completions", json=payload) as response:
+                    if response.status_code in RETRYABLE_STATUS:
+                        raise RetryableStatusError(response)
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        # Server-sent events ("data: {...}"); bare JSON lines are accepted too.
+                        data = line[len("data:"):].strip() if line.startswith("data:") else line.strip()
+                        if not data.startswith("{"):
+                            if data == "[DONE]":
+                                return
+                            continue
+                        choice = json.loads(data).get("choices", [{}])[0]
+                        text = (choice.get("delta") or choice.get("message") or {}).get("content")
+                        if text:
+                            yielded = True
+                            yield text
+                    return
+            except (httpx.TransportError, RetryableStatusError) as e:
+                if yielded or attempt == self.max_retries:
+                    self.stats["errors"] += 1
+                    raise
+                self.stats["retries"] += 1
+                if observer is not None:
+                    observer.count("retries")
+                await asyncio.sleep(self._retry_delay(attempt, getattr(e, "response", None)))
+            except httpx.HTTPError:
+                self.stats["errors"] += 1
+                raise
+
+    async def embed(self, texts, model="text-embedding-3-small", batch_size=96, observer=None):
+        """Embed texts in concurrent batches, preserving input order."""
+        async def request(batch):
+            data = await self._post("/embeddings", {"model": model, "input": list(batch)}, observer)
+            return [item["embedding"] for item in sorted(data["data"], key=lambda item: item.get("index", 0))]
+
+        batches = [tuple(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+        results = await asyncio.gather(*(
+            self._coalesce(("embed", model, batch), lambda batch=batch: request(batch)) for batch in batches
+        ))
+        return [vector for batch in results for vector in batch]
+
+    async def aclose(self):
+        await self._http.aclose()
+
+
+class EuriClient:
+    """Blocking facade over ``AsyncEuriClient``, safe to call from any thread."""
+
+    def __init__(self, api_key, **kwargs):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="euri-client", daemon=True)
+        self._thread.start()
+        self.aio = self._run(self._create(api_key, kwargs))
+
+    @staticmethod
+    async def _create(api_key, kwargs):
+        return AsyncEuriClient(api_key, **kwargs)
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    @property
+    def stats(self):
+        return dict(self.aio.stats)
+
+    def complete(self, prompt, model="gpt-4.1-nano", temperature=0.7, max_tokens=300, stop=None, observer=None):
+        return self._run(self.aio.complete(prompt, model, temperature, max_tokens, stop, observer))
+
+    def stream(self, prompt, model="gpt-4.1-nano", temperature=0.7, max_tokens=300, stop=None, observer=None):
+        """Blocking generator over ``AsyncEuriClient.stream``; closing it cancels the request."""
+        chunks = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for text in self.aio.stream(prompt, model, temperature, max_tokens, stop, observer):
+                    chunks.put(text)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def embed(self, texts, model="text-embedding-3-small", observer=None):
+        return self._run(self.aio.embed(list(texts), model, observer=observer))
+
+    def close(self):
+        self._run(self.aio.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key):
+    """Return the process-wide client for ``api_key``, creating it on first use."""
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = EuriClient(api_key)
+            registry.register_collector("llm_client", client_stats)
+        return _clients[api_key]
+
+
+def client_stats():
+    """Request, retry, coalescing and error counts summed over all clients."""
+    with _clients_lock:
+        clients = list(_clients.values())
+    totals = {"requests": 0, "retries": 0, "coalesced": 0, "errors": 0}
+    for client in clients:
+        for name, value in client.stats.items():
+            totals[name] += value
+    return totals
+
+
+def __getattr__(name):
+    # The LangChain adapters pull in langchain_core, which is slow to import; load them on first use.
+    if name in ("EuriLLM", "EuriEmbeddings"):
+        import langchain_adapters
+        return getattr(langchain_adapters, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def check_endpoints(api_key, base_url=None):
+    """Call the chat, streaming and embedding endpoints once each and describe what came back.
+
+    Raises if a call fails or its response does not have the shape this client reads.
+    """
+    client = EuriClient(api_key, base_url=base_url)
+    try:
+        text = client.complete("Reply with the word ready.", max_tokens=5)
+        if not text:
+            raise ValueError("Chat completion returned no choices[0].message.content.")
+        chunks = list(client.stream("Count from one to five.", max_tokens=20))
+        if not chunks:
+            raise ValueError("Streamed completion yielded no choices[0].delta.content.")
+        vectors = client.embed(["resume", "job description"])
+        if len(vectors) != 2 or not vectors[0]:
+            raise ValueError("Embeddings response had no data[].embedding vectors.")
+        return {"base_url": client.aio.base_url, "completion": text, "stream_chunks": len(chunks),
+                "embedding_dim": len(vectors[0])}
+    finally:
+        client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the Euriai endpoints this client uses.")
+    parser.add_argument("--check", action="store_true", required=True)
+    parser.add_argument("--api-key", default=None, help="EURI API key (defaults to $EURI_API_KEY).")
+    parser.add_argument("--base-url", default=None, help=f"Endpoint base URL (default: {EURI_BASE_URL}).")
+    args = parser.parse_args(argv)
+    from dotenv import load_dotenv
+    load_dotenv()
+    api_key = args.api_key or os.environ.get("EURI_API_KEY")
+    if not api_key:
+        parser.error("an API key is required (--api-key or EURI_API_KEY)")
+    print(json.dumps(check_endpoints(api_key, args.base_url), indent=2))
+
+
+if __name__ == "__main__":
+    main()
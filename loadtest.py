@@ -0,0 +1,122 @@
+"""Load test for the screening service.
+
+    python service.py --stub --workers 8 --queue-size 50 &
+    python loadtest.py --requests 200 --concurrency 32
+
+Submits synthetic resumes to ``POST /analyze`` from many concurrent clients,
+polls each job to completion and optionally asks one question per analysis.
+Reports end-to-end latency percentiles, throughput, failures and how often
+the queue pushed back with 503.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmark import SIZES, percentiles, synthetic_resume
+
+POLL_WAIT = 10
+
+
+async def wait_for(client, job_id):
+    while True:
+        response = await client.get(f"/jobs/{job_id}", params={"wait": POLL_WAIT})
+        response.raise_for_status()
+        job = response.json()
+        if job["status"] in ("done", "failed"):
+            return job
+
+
+async def submit(client, path, stats, **kwargs):
+    """POST until the queue accepts the job, backing off on 503; returns the job id."""
+    while True:
+        response = await client.post(path, **kwargs)
+        if response.status_code != 503:
+            response.raise_for_status()
+            return response.json()["job_id"]
+        stats["rejected"] += 1
+        await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+
+
+async def one_flow(client, index, args, stats):
+    resume = synthetic_resume(args.size, args.seed + index).encode("utf-8")
+    started = time.perf_counter()
+    job_id = await submit(client, "/analyze", stats, files={"resume": (f"resume_{index}.txt", resume, "text/plain")},
+                          data={"role": args.role})
+    job = await wait_for(client, job_id)
+    stats["analyze"].append(time.perf_counter() - started)
+    if job["status"] != "done":
+        stats["failed"] += 1
+        return
+    if args.ask:
+        asked = time.perf_counter()
+        answer = await wait_for(client, await submit(client, f"/analyses/{job_id}/ask", stats,
+                                                     json={"question": "What are the candidate's strongest skills?"}))
+        stats["ask"].append(time.perf_counter() - asked)
+        if answer["status"] != "done":
+            stats["failed"] += 1
+            return
+    stats["flow"].append(time.perf_counter() - started)
+
+
+async def run(args):
+    stats = {"analyze": [], "ask": [], "flow": [], "failed": 0, "rejected": 0}
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def limited(client, index):
+        async with limit:
+            try:
+                await one_flow(client, index, args, stats)
+            except httpx.HTTPError as e:
+                stats["failed"] += 1
+                print(f"request {index} failed: {e}")
+
+    timeout = httpx.Timeout(POLL_WAIT + 30)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(limited(client, index) for index in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        server = (await client.get("/health")).json()
+    return {
+        "config": vars(args),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_flows_per_minute": round(len(stats["flow"]) / elapsed * 60, 2) if elapsed else 0.0,
+        "completed": len(stats["flow"]),
+        "failed": stats["failed"],
+        "rejected": stats["rejected"],
+        "analyze": percentiles(stats["analyze"]),
+        "ask": percentiles(stats["ask"]),
+        "flow": percentiles(stats["flow"]),
+        "server": server,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test a running screening service.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=50, help="Resumes submitted in total.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clients submitting at the same time.")
+    parser.add_argument("--size", choices=list(SIZES), default="medium")
+    parser.add_argument("--role", default="Backend Engineer")
+    parser.add_argument("--no-ask", dest="ask", action="store_false", help="Only analyze; skip the follow-up question.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this path.")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    flow = results["flow"]
+    if flow["count"]:
+        print(f"{results['completed']} flows in {results['elapsed_seconds']}s "
+              f"({results['throughput_flows_per_minute']} flows/min), p50 {flow['p50']:.3f}s p95 {flow['p95']:.3f}s")
+    print(f"{results['failed']} failed, {results['rejected']} rejected with 503")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Stage timings, request counters and token estimates.
+
+Every ``ResumeAnalysisAgent`` analysis gets a ``Trace`` recording how long
+each stage took and what it cost. Traces also feed a process-wide registry,
+which can be dumped as Prometheus text or JSON together with any registered
+collectors (cache hit rates, client retry counts).
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+logger = logging.getLogger("recruitment_agent")
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English text)."""
+    return (len(text) + 3) // 4 if text else 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = defaultdict(lambda: {"count": 0, "seconds": 0.0, "max_seconds": 0.0, "errors": 0})
+        self._counters = defaultdict(float)
+        self._collectors = {}
+
+    def observe_stage(self, stage, seconds, failed=False):
+        with self._lock:
+            entry = self._stages[stage]
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["errors"] += int(failed)
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def register_collector(self, name, collect):
+        """Add a callable returning ``{metric: number}`` to be sampled on every dump."""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def snapshot(self):
+        with self._lock:
+            stages = {name: dict(entry) for name, entry in self._stages.items()}
+            counters = dict(self._counters)
+            collectors = dict(self._collectors)
+        collected = {}
+        for name, collect in collectors.items():
+            try:
+                collected[name] = {k: v for k, v in collect().items() if isinstance(v, (int, float))}
+            except Exception:
+                logger.exception("Metrics collector %s failed", name)
+        return {"stages": stages, "counters": counters, "collectors": collected}
+
+    def render_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def render_prometheus(self):
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP recruitment_stage_seconds Wall time spent in each analysis stage.",
+            "# TYPE recruitment_stage_seconds summary",
+        ]
+        for stage, entry in sorted(snapshot["stages"].items()):
+            lines.append(f'recruitment_stage_seconds_sum{{stage="{stage}"}} {entry["seconds"]:.6f}')
+            lines.append(f'recruitment_stage_seconds_count{{stage="{stage}"}} {entry["count"]}')
+        lines += ["# HELP recruitment_stage_errors_total Stages that raised.",
+                  "# TYPE recruitment_stage_errors_total counter"]
+        for stage, entry in sorted(snapshot["stages"].items()):
+            lines.append(f'recruitment_stage_errors_total{{stage="{stage}"}} {entry["errors"]}')
+        lines += ["# HELP recruitment_events_total Requests, tokens, cache lookups and retries.",
+                  "# TYPE recruitment_events_total counter"]
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f'recruitment_events_total{{event="{name}"}} {value:g}')
+        lines += ["# HELP recruitment_component_value Values sampled from caches and clients.",
+                  "# TYPE recruitment_component_value gauge"]
+        for component, values in sorted(snapshot["collectors"].items()):
+            for name, value in sorted(values.items()):
+                lines.append(f'recruitment_component_value{{component="{component}",name="{name}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class Trace:
+    """Stage timings and counters for one analysis and the follow-up calls made on it."""
+
+    def __init__(self, name="analysis"):
+        self.name = name
+        self.started_at = time.time()
+        self.stages = []
+        self.counters = defaultdict(float)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            self.count("errors")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, failed)
+
+    def observe(self, name, seconds, failed=False):
+        """Record a timing measured elsewhere, e.g. time to first token, as a stage."""
+        with self._lock:
+            self.stages.append({"stage": name, "seconds": round(seconds, 6), "error": failed})
+        registry.observe_stage(name, seconds, failed)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+        registry.inc(name, value)
+
+    def record_llm(self, prompt, completion):
+        self.count("llm_requests")
+        self.count("prompt_tokens", estimate_tokens(prompt))
+        self.count("completion_tokens", estimate_tokens(completion))
+
+    def record_embedding(self, texts):
+        self.count("embedding_requests")
+        self.count("embedded_texts", len(texts))
+        self.count("embedding_tokens", sum(estimate_tokens(text) for text in texts))
+
+    def summary(self):
+        """Total seconds and calls per stage name."""
+        totals = {}
+        with self._lock:
+            for entry in self.stages:
+                total = totals.setdefault(entry["stage"], {"calls": 0, "seconds": 0.0, "errors": 0})
+                total["calls"] += 1
+                total["seconds"] += entry["seconds"]
+                total["errors"] += int(entry["error"])
+        for total in totals.values():
+            total["seconds"] = round(total["seconds"], 6)
+        return totals
+
+    def to_dict(self):
+        with self._lock:
+            stages = list(self.stages)
+            counters = dict(self.counters)
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "stages": stages,
+            "totals": self.summary(),
+            "counters": counters,
+        }
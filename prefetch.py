@@ -0,0 +1,183 @@
+"""Background prefetching of likely follow-up requests.
+
+After an analysis, ``PrefetchScheduler`` starts the calls a user is likely to
+make next (see ``ResumeAnalysisAgent.likely_followups``) on worker threads, in
+priority order and within a token budget. A tab that asks for the same call
+follows the running task instead of starting its own, so it shows the partial
+answer at once and the rest as it arrives. Finished answers land in the
+response cache as usual.
+"""
+import heapq
+import itertools
+import threading
+
+from metrics import logger
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+def followup_key(name, args):
+    """Hashable key for a call, treating lists in ``args`` as tuples."""
+    return (name, tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args))
+
+
+class PrefetchTask:
+    def __init__(self, key, priority, cost, start):
+        self.key = key
+        self.priority = priority
+        self.cost = cost
+        self._start = start
+        self.state = QUEUED
+        self.error = None
+        self._chunks = []
+        self._changed = threading.Condition()
+        self._cancelled = threading.Event()
+
+    @property
+    def text(self):
+        with self._changed:
+            return "".join(self._chunks)
+
+    def cancel(self):
+        with self._changed:
+            self._cancelled.set()
+            # A queued task may never be run now, so it is finished as far as followers are concerned.
+            if self.state == QUEUED:
+                self.state = CANCELLED
+            self._changed.notify_all()
+
+    def run(self):
+        with self._changed:
+            if self._cancelled.is_set():
+                self.state = CANCELLED
+                self._changed.notify_all()
+                return
+            self.state = RUNNING
+        stream = self._start()
+        try:
+            for chunk in stream:
+                if self._cancelled.is_set():
+                    break
+                with self._changed:
+                    self._chunks.append(chunk)
+                    self._changed.notify_all()
+        except Exception as e:
+            logger.warning("Prefetch of %s failed: %s", self.key[0], e)
+            with self._changed:
+                self.state, self.error = FAILED, e
+                self._changed.notify_all()
+            return
+        finally:
+            # Closing the stream aborts the request if it was cancelled mid-way.
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+        with self._changed:
+            self.state = CANCELLED if self._cancelled.is_set() else DONE
+            self._changed.notify_all()
+
+    def follow(self):
+        """Yield the answer from the start, waiting for chunks that have not arrived yet."""
+        sent = 0
+        while True:
+            with self._changed:
+                while sent == len(self._chunks) and self.state in (QUEUED, RUNNING):
+                    self._changed.wait()
+                chunks = self._chunks[sent:]
+                state, error = self.state, self.error
+            sent += len(chunks)
+            yield from chunks
+            if not chunks:
+                if state == FAILED:
+                    raise error
+                if state == CANCELLED:
+                    raise RuntimeError("The background request was cancelled.")
+                return
+
+
+class PrefetchScheduler:
+    """Runs prefetch tasks on ``max_workers`` threads, highest priority (lowest number) first."""
+
+    def __init__(self, max_workers=1):
+        self.max_workers = max_workers
+        self.budget = 0
+        self.spent = 0
+        self._tasks = {}
+        self._queue = []
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._workers = []
+        self._closed = False
+
+    def reset(self, budget):
+        """Cancel all outstanding tasks and start a new round with ``budget`` estimated tokens."""
+        with self._lock:
+            for task in self._tasks.values():
+                task.cancel()
+            self._tasks = {}
+            self._queue = []
+            self.budget = budget
+            self.spent = 0
+
+    def submit(self, name, args, cost, start, priority=10):
+        """Queue ``start()`` (a chunk iterator) unless it would exceed the budget; return the task or None."""
+        key = followup_key(name, args)
+        with self._lock:
+            if self._closed or key in self._tasks or self.spent + cost > self.budget:
+                return self._tasks.get(key)
+            task = PrefetchTask(key, priority, cost, start)
+            self._tasks[key] = task
+            self.spent += cost
+            heapq.heappush(self._queue, (priority, next(self._order), task))
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name="prefetch", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._ready.notify()
+            return task
+
+    def _work(self):
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._ready.wait()
+                if self._closed:
+                    return
+                _, _, task = heapq.heappop(self._queue)
+            task.run()
+
+    def get(self, name, args):
+        with self._lock:
+            return self._tasks.get(followup_key(name, args))
+
+    def follow(self, name, args):
+        """Stream of a prefetched answer for this call, or None if there is no usable task."""
+        task = self.get(name, args)
+        if task is None or task.state in (FAILED, CANCELLED):
+            return None
+        return task.follow()
+
+    def status(self):
+        """``{call name: (state, characters received)}`` for the current round."""
+        with self._lock:
+            tasks = list(self._tasks.values())
+        return {task.key[0]: (task.state, len(task.text)) for task in tasks}
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            for task in self._tasks.values():
+                task.cancel()
+            self._ready.notify_all()
+
+
+def prefetch_followups(scheduler, agent, target_role, budget):
+    """Cancel the previous round and queue the agent's likely follow-ups within ``budget`` tokens."""
+    scheduler.reset(budget)
+    queued = []
+    for priority, (name, args, cost, start) in enumerate(agent.likely_followups(target_role)):
+        if scheduler.submit(name, args, cost, start, priority=priority) is not None:
+            queued.append(name)
+            agent.trace.count("prefetch_tokens_reserved", cost)
+    return queued
@@ -0,0 +1,83 @@
+"""Token-budgeted resume context for improvement and rewrite prompts.
+
+Short resumes go into prompts whole, minus boilerplate. Longer ones are cut
+down to the chunks of the resume's vector store most relevant to the request,
+merged where the chunks overlap and kept in document order, or split into
+sections that can be rewritten independently.
+"""
+import re
+from collections import Counter
+
+from metrics import estimate_tokens
+
+PAGE_NUMBER = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?$", re.IGNORECASE)
+# A short contact/title-like line appearing this often is a running header or footer.
+REPEATED_LINE_MIN = 3
+REPEATED_LINE_MAX_CHARS = 80
+RUNNING_LINE = re.compile(r"@|https?://|www\.|\||\d|\bpage\b|\bresume\b|curriculum vitae|confidential", re.IGNORECASE)
+EXCERPT_SEPARATOR = "\n[...]\n"
+
+
+def repeated_lines(text):
+    counts = Counter(line.strip() for line in text.splitlines() if line.strip())
+    return {line for line, count in counts.items()
+            if count >= REPEATED_LINE_MIN and len(line) <= REPEATED_LINE_MAX_CHARS and RUNNING_LINE.search(line)}
+
+
+def trim_boilerplate(text, reference=None):
+    """Drop page numbers, running headers/footers (found in ``reference``, default ``text``) and blank runs."""
+    repeated = repeated_lines(reference if reference is not None else text)
+    kept = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped and (stripped in repeated or PAGE_NUMBER.match(stripped)):
+            continue
+        line = re.sub(r"[ \t]+", " ", line).rstrip()
+        if not line and (not kept or not kept[-1]):
+            continue
+        kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def _merge_spans(spans):
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def select_context(text, doc_lists, budget_tokens):
+    """Assemble the most relevant chunks of ``text`` within ``budget_tokens``.
+
+    ``doc_lists`` holds one ranked list of retrieved documents per query; queries
+    take turns contributing their next-best chunk. Overlapping chunks are merged,
+    and the excerpts are returned in document order with boilerplate trimmed.
+    """
+    ranked = []
+    for rank in range(max((len(docs) for docs in doc_lists), default=0)):
+        for docs in doc_lists:
+            if rank < len(docs) and docs[rank].page_content not in ranked:
+                ranked.append(docs[rank].page_content)
+
+    spans = []
+    context = ""
+    for chunk in ranked:
+        start = text.find(chunk)
+        if start < 0:
+            continue
+        candidate = _merge_spans(spans + [(start, start + len(chunk))])
+        assembled = trim_boilerplate(EXCERPT_SEPARATOR.join(text[s:e] for s, e in candidate), reference=text)
+        if estimate_tokens(assembled) > budget_tokens:
+            continue
+        spans, context = candidate, assembled
+    return context
+
+
+def split_sections(text, budget_tokens):
+    """Split ``text`` into consecutive parts of at most about ``budget_tokens`` each, at paragraph breaks if possible."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=budget_tokens * 4, chunk_overlap=0, length_function=len)
+    return splitter.split_text(text)
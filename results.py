@@ -0,0 +1,311 @@
+"""Persistent store of screening results for ranking and filtering candidates.
+
+Every screened resume's overall score and per-skill scores are kept in SQLite,
+per target (a predefined role or a job description). Skill names are stored
+once and referenced by id, and skill scores live in their own narrow table
+indexed by (target, skill, score), so top-k, "has skill >= N" and cutoff
+queries stay index lookups over hundreds of thousands of candidates.
+Selection and missing skills are derived from the stored scores, so trying
+another cutoff is a query rather than a re-analysis.
+
+Example:
+    python results.py --role "Backend Engineer" --top 20 --skill Python:7 --skill Docker:5
+    python results.py --jd job.txt --sweep 50 60 70 80
+    python results.py --targets
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from metrics import registry
+from scoring import MISSING_SKILL_SCORE, STRENGTH_SCORE
+
+RESULTS_DB = os.environ.get("RECRUITMENT_AGENT_RESULTS_DB", "screening_results.sqlite3")
+DEFAULT_CUTOFF = 75
+
+# SQLite caps the number of bound parameters per statement.
+_SQL_BATCH = 500
+
+
+def role_target(role):
+    return f"role:{role}"
+
+
+def jd_target(jd_data):
+    """Target key for a job description, from the bytes of its file."""
+    return "jd:" + hashlib.sha256(jd_data).hexdigest()[:16]
+
+
+class ResultsStore:
+    def __init__(self, path=None):
+        self.path = path or RESULTS_DB
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "CREATE TABLE IF NOT EXISTS targets ("
+            "target_id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, label TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS skills (skill_id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS candidates ("
+            "candidate_id INTEGER PRIMARY KEY, target_id INTEGER NOT NULL, digest TEXT NOT NULL, "
+            "file TEXT NOT NULL, overall_score INTEGER NOT NULL, screened_at REAL NOT NULL, "
+            "UNIQUE (target_id, digest));"
+            "CREATE INDEX IF NOT EXISTS idx_candidates_score ON candidates (target_id, overall_score);"
+            "CREATE TABLE IF NOT EXISTS skill_scores ("
+            "candidate_id INTEGER NOT NULL, skill_id INTEGER NOT NULL, target_id INTEGER NOT NULL, "
+            "score INTEGER NOT NULL, PRIMARY KEY (candidate_id, skill_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS idx_skill_scores_skill ON skill_scores (target_id, skill_id, score);"
+        )
+
+    def _target_id(self, key, label=None):
+        """Id of a target; with a ``label`` it is created if missing, otherwise None is returned."""
+        if label is not None:
+            self._conn.execute("INSERT OR IGNORE INTO targets (key, label) VALUES (?, ?)", (key, label))
+        row = self._conn.execute("SELECT target_id FROM targets WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _skill_id(self, name, create=False):
+        if create:
+            self._conn.execute("INSERT OR IGNORE INTO skills (name) VALUES (?)", (name,))
+        row = self._conn.execute("SELECT skill_id FROM skills WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _skill_names(self):
+        return dict(self._conn.execute("SELECT skill_id, name FROM skills"))
+
+    def add(self, target, row, label=None):
+        self.add_many(target, [row], label)
+
+    def add_many(self, target, rows, label=None):
+        """Store screening result rows (``file``, ``digest``, ``overall_score``, ``skill_scores``) for ``target``.
+
+        A resume already stored for the target is replaced; rows that failed are skipped.
+        """
+        rows = [row for row in rows if row.get("error") is None and row.get("overall_score") is not None]
+        now = time.time()
+        with self._lock, self._conn:
+            target_id = self._target_id(target, label or target)
+            skill_ids = {name: self._skill_id(name, create=True)
+                         for name in {skill for row in rows for skill in row.get("skill_scores") or {}}}
+            for i in range(0, len(rows), _SQL_BATCH):
+                batch = rows[i:i + _SQL_BATCH]
+                self._conn.executemany(
+                    "INSERT INTO candidates (target_id, digest, file, overall_score, screened_at) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (target_id, digest) DO UPDATE SET "
+                    "file = excluded.file, overall_score = excluded.overall_score, screened_at = excluded.screened_at",
+                    [(target_id, row["digest"], row["file"], int(row["overall_score"]), now) for row in batch]
+                )
+                digests = [row["digest"] for row in batch]
+                candidate_ids = dict(self._conn.execute(
+                    "SELECT digest, candidate_id FROM candidates "
+                    f"WHERE target_id = ? AND digest IN ({', '.join('?' * len(digests))})", [target_id] + digests
+                ))
+                ids = list(candidate_ids.values())
+                self._conn.execute(
+                    f"DELETE FROM skill_scores WHERE candidate_id IN ({', '.join('?' * len(ids))})", ids
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO skill_scores (candidate_id, skill_id, target_id, score) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(candidate_ids[row["digest"]], skill_ids[skill], target_id, int(score))
+                     for row in batch for skill, score in (row.get("skill_scores") or {}).items()]
+                )
+
+    def _filter(self, target, min_score=None, skills=None):
+        """FROM/WHERE clause and parameters for the candidates of ``target`` passing the filters, or None."""
+        target_id = self._target_id(target)
+        if target_id is None:
+            return None
+        sql = " FROM candidates c"
+        params = []
+        for i, (skill, minimum) in enumerate((skills or {}).items()):
+            skill_id = self._skill_id(skill)
+            if skill_id is None:
+                return None
+            sql += (f" JOIN skill_scores s{i} ON s{i}.candidate_id = c.candidate_id"
+                    f" AND s{i}.target_id = ? AND s{i}.skill_id = ? AND s{i}.score >= ?")
+            params += [target_id, skill_id, minimum]
+        sql += " WHERE c.target_id = ?"
+        params.append(target_id)
+        if min_score is not None:
+            sql += " AND c.overall_score >= ?"
+            params.append(min_score)
+        return sql, params
+
+    def query(self, target, min_score=None, skills=None, limit=None, cutoff=DEFAULT_CUTOFF):
+        """Candidates for ``target``, best first, with an overall score of at least ``min_score``.
+
+        ``skills`` maps skill names to the minimum score a candidate needs in each. Rows have the
+        screening result fields, with ``selected`` and ``missing_skills`` derived from ``cutoff``
+        and the stored skill scores.
+        """
+        with self._lock:
+            clause = self._filter(target, min_score, skills)
+            if clause is None:
+                return []
+            sql, params = clause
+            sql = ("SELECT c.candidate_id, c.file, c.digest, c.overall_score, c.screened_at" + sql +
+                   " ORDER BY c.overall_score DESC, c.candidate_id")
+            if limit is not None:
+                sql += " LIMIT ?"
+                params.append(limit)
+            candidates = self._conn.execute(sql, params).fetchall()
+            names = self._skill_names()
+            scores = {candidate[0]: {} for candidate in candidates}
+            ids = list(scores)
+            for i in range(0, len(ids), _SQL_BATCH):
+                batch = ids[i:i + _SQL_BATCH]
+                for candidate_id, skill_id, score in self._conn.execute(
+                    "SELECT candidate_id, skill_id, score FROM skill_scores "
+                    f"WHERE candidate_id IN ({', '.join('?' * len(batch))})", batch
+                ):
+                    scores[candidate_id][names[skill_id]] = score
+        return [
+            {
+                "file": file,
+                "digest": digest,
+                "overall_score": overall,
+                "selected": overall >= cutoff,
+                "skill_scores": scores[candidate_id],
+                "strengths": [s for s, score in scores[candidate_id].items() if score >= STRENGTH_SCORE],
+                "missing_skills": [s for s, score in scores[candidate_id].items() if score <= MISSING_SKILL_SCORE],
+                "screened_at": screened_at,
+            }
+            for candidate_id, file, digest, overall, screened_at in candidates
+        ]
+
+    def top(self, target, k=10, **filters):
+        return self.query(target, limit=k, **filters)
+
+    def count(self, target, min_score=None, skills=None):
+        with self._lock:
+            clause = self._filter(target, min_score, skills)
+            if clause is None:
+                return 0
+            sql, params = clause
+            return self._conn.execute("SELECT COUNT(*)" + sql, params).fetchone()[0]
+
+    def cutoff_sweep(self, target, cutoffs):
+        """``[{cutoff, selected, rate}]``: how many candidates each cutoff would select, from one score histogram."""
+        with self._lock:
+            target_id = self._target_id(target)
+            histogram = self._conn.execute(
+                "SELECT overall_score, COUNT(*) FROM candidates WHERE target_id = ? GROUP BY overall_score",
+                (target_id,)
+            ).fetchall() if target_id is not None else []
+        total = sum(count for _, count in histogram)
+        sweep = []
+        for cutoff in cutoffs:
+            selected = sum(count for score, count in histogram if score >= cutoff)
+            sweep.append({"cutoff": cutoff, "selected": selected, "rate": round(selected / total, 4) if total else 0.0})
+        return sweep
+
+    def skill_names(self, target):
+        with self._lock:
+            target_id = self._target_id(target)
+            if target_id is None:
+                return []
+            return sorted(name for (name,) in self._conn.execute(
+                "SELECT name FROM skills WHERE skill_id IN "
+                "(SELECT DISTINCT skill_id FROM skill_scores WHERE target_id = ?)", (target_id,)
+            ))
+
+    def targets(self):
+        """``[{key, label, candidates}]`` for every target with stored results."""
+        with self._lock:
+            return [
+                {"key": key, "label": label, "candidates": count}
+                for key, label, count in self._conn.execute(
+                    "SELECT t.key, t.label, COUNT(c.candidate_id) FROM targets t "
+                    "LEFT JOIN candidates c ON c.target_id = t.target_id GROUP BY t.target_id ORDER BY t.label"
+                )
+            ]
+
+    def frame(self, target):
+        """Results for ``target`` as a pandas DataFrame with one column per skill."""
+        import pandas as pd
+
+        return pd.DataFrame([{"file": row["file"], "overall_score": row["overall_score"], **row["skill_scores"]}
+                             for row in self.query(target)])
+
+    def stats(self):
+        with self._lock:
+            return {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("candidates", "targets", "skills")
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_results_store(path=None):
+    """Return the process-wide results store, opening ``path`` (default ``RESULTS_DB``) on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultsStore(path)
+            registry.register_collector("results", _store.stats)
+        return _store
+
+
+def _skill_filter(value):
+    skill, _, minimum = value.rpartition(":")
+    if not skill or not minimum.isdigit():
+        raise argparse.ArgumentTypeError(f"expected SKILL:SCORE, got {value!r}")
+    return skill, int(minimum)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query stored screening results.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--role", help="Predefined role the resumes were screened against.")
+    target.add_argument("--jd", help="Job description file the resumes were screened against.")
+    target.add_argument("--targets", action="store_true", help="List the roles and JDs with stored results.")
+    parser.add_argument("--store", default=RESULTS_DB, help="Results database.")
+    parser.add_argument("--top", type=int, default=20, help="Number of candidates to list.")
+    parser.add_argument("--min-score", type=int, default=None, help="Minimum overall score.")
+    parser.add_argument("--skill", type=_skill_filter, action="append", default=[],
+                        help="SKILL:SCORE; only candidates scoring at least SCORE in SKILL (repeatable).")
+    parser.add_argument("--cutoff", type=int, default=DEFAULT_CUTOFF, help="Overall score needed to be selected.")
+    parser.add_argument("--sweep", type=int, nargs="+", default=None,
+                        help="Report how many candidates each of these cutoffs would select.")
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.store)
+    if args.targets:
+        for entry in store.targets():
+            print(f"{entry['candidates']:>8}  {entry['label']}  ({entry['key']})")
+        return
+    if args.role:
+        key = role_target(args.role)
+    else:
+        with open(args.jd, "rb") as f:
+            key = jd_target(f.read())
+
+    if args.sweep:
+        for entry in store.cutoff_sweep(key, args.sweep):
+            print(f"cutoff {entry['cutoff']:>3}: {entry['selected']} selected ({entry['rate']:.1%})")
+        return
+    skills = dict(args.skill)
+    rows = store.top(key, args.top, min_score=args.min_score, skills=skills, cutoff=args.cutoff)
+    print(f"{store.count(key, args.min_score, skills)} candidates match; top {len(rows)}:")
+    for rank, row in enumerate(rows, 1):
+        mark = "✓" if row["selected"] else " "
+        missing = ", ".join(row["missing_skills"])
+        missing = f"  (missing: {missing})" if missing else ""
+        print(f"{rank:>4}. {mark} {row['overall_score']:>3}%  {row['file']}{missing}")
+
+
+if __name__ == "__main__":
+    main()
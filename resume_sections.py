@@ -0,0 +1,160 @@
+"""Section-aware chunking of resumes.
+
+Resumes are split at their section headings (Experience, Skills, Education,
+...) and, inside long sections, between entries and then between bullets, so
+chunks follow the resume's own structure and need no overlap. Every chunk is
+an exact substring of the resume text and lists the sections it covers in its
+metadata, which retrieval can filter on. Sections too small to stand alone
+(a name and contact line, a one-line education entry) share a chunk with
+their neighbours.
+"""
+import re
+
+CHUNK_SIZE = 1000
+# Sections and chunks smaller than this share a chunk with their neighbours rather than being embedded alone.
+MIN_CHUNK_CHARS = 250
+MAX_HEADING_CHARS = 40
+# Text before the first heading: name, contact details and often a headline.
+HEADER_SECTION = "header"
+SECTION_HEADINGS = {
+    "summary": ["summary", "profile", "professional summary", "career summary", "objective", "career objective",
+                "about", "about me"],
+    "experience": ["experience", "work experience", "professional experience", "relevant experience", "employment",
+                   "employment history", "work history", "career history"],
+    "skills": ["skills", "technical skills", "core skills", "key skills", "skills and tools", "competencies",
+               "core competencies", "technologies", "tools", "tech stack", "expertise"],
+    "projects": ["projects", "personal projects", "key projects", "selected projects", "side projects"],
+    "education": ["education", "academic background", "academics", "qualifications", "education and training"],
+    "certifications": ["certifications", "certificates", "licenses", "licenses and certifications", "courses",
+                       "training"],
+    "awards": ["awards", "honors", "honours", "achievements", "accomplishments"],
+    "publications": ["publications", "research", "patents"],
+    "languages": ["languages"],
+    "interests": ["interests", "hobbies", "volunteering", "volunteer experience", "activities"],
+}
+BULLET = re.compile(r"^\s*(?:[-*•▪◦●■➢>]|\d{1,2}[.)])\s+")
+
+
+def _normalize_heading(text):
+    text = text.lower().replace("&", " and ")
+    return " ".join(re.sub(r"[^a-z ]", " ", text).split())
+
+
+_HEADING_NAMES = {_normalize_heading(alias): section
+                  for section, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+
+def heading_section(line):
+    """The section a line starts, if it is a heading (``Skills``, ``WORK EXPERIENCE:``, ``Skills: Python, ...``)."""
+    stripped = line.strip()
+    label = stripped.split(":", 1)[0] if ":" in stripped else stripped
+    if not label or len(label) > MAX_HEADING_CHARS:
+        return None
+    return _HEADING_NAMES.get(_normalize_heading(label))
+
+
+def find_sections(text):
+    """``[(section, start, end)]`` spans of ``text`` in document order, empty sections left out."""
+    sections = []
+    section, start, offset = HEADER_SECTION, 0, 0
+    for line in text.splitlines(keepends=True):
+        name = heading_section(line)
+        if name is not None:
+            if text[start:offset].strip():
+                sections.append((section, start, offset))
+            section, start = name, offset
+        offset += len(line)
+    if text[start:].strip():
+        sections.append((section, start, len(text)))
+    return sections
+
+
+def _lines(text, start, end):
+    offset = start
+    for line in text[start:end].splitlines(keepends=True):
+        yield line, offset, offset + len(line)
+        offset += len(line)
+
+
+def _entries(text, start, end):
+    """Spans of a section's entries: runs of lines ended by a blank line, or by a plain line after bullets."""
+    entries = []
+    entry = None
+    after_bullet = False
+    for line, line_start, line_end in _lines(text, start, end):
+        if not line.strip():
+            if entry:
+                entries.append(entry)
+            entry, after_bullet = None, False
+            continue
+        bullet = bool(BULLET.match(line))
+        if entry and after_bullet and not bullet:
+            entries.append(entry)
+            entry = None
+        entry = (entry[0], line_end) if entry else (line_start, line_end)
+        after_bullet = bullet
+    if entry:
+        entries.append(entry)
+    return entries
+
+
+def _pieces(text, start, end, chunk_size):
+    """Spans no longer than ``chunk_size``: the entry itself, else its lines, else parts of over-long lines."""
+    if end - start <= chunk_size:
+        return [(start, end)]
+    pieces = []
+    splitter = None
+    for line, line_start, line_end in _lines(text, start, end):
+        if not line.strip():
+            continue
+        if line_end - line_start <= chunk_size:
+            pieces.append((line_start, line_end))
+            continue
+        if splitter is None:
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+            splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=0, length_function=len)
+        cursor = line_start
+        for part in splitter.split_text(line):
+            part_start = text.index(part, cursor)
+            pieces.append((part_start, part_start + len(part)))
+            cursor = part_start + len(part)
+    return pieces
+
+
+def section_chunks(text, chunk_size=CHUNK_SIZE):
+    """Split a resume into ``(chunk, metadata)`` pairs along its sections, entries and bullets.
+
+    ``metadata`` has ``section`` (the one contributing most of the chunk), ``sections`` (all
+    it covers) and ``start`` (its offset in ``text``).
+    """
+    chunks = []
+    current = None
+
+    def flush():
+        if current is not None:
+            start, end, shares = current
+            chunk = text[start:end].strip()
+            if chunk:
+                chunks.append((chunk, {
+                    "section": max(shares, key=shares.get),
+                    "sections": list(shares),
+                    "start": start + len(text[start:end]) - len(text[start:end].lstrip()),
+                }))
+
+    for section, section_start, section_end in find_sections(text):
+        small_section = section_end - section_start < MIN_CHUNK_CHARS
+        first = True
+        for entry_start, entry_end in _entries(text, section_start, section_end):
+            for start, end in _pieces(text, entry_start, entry_end, chunk_size):
+                fits = current is not None and end - current[0] <= chunk_size
+                # A new section starts a new chunk unless it or the current chunk is too small to stand alone.
+                if fits and (not first or small_section or current[1] - current[0] < MIN_CHUNK_CHARS):
+                    shares = current[2]
+                    shares[section] = shares.get(section, 0) + end - start
+                    current = (current[0], end, shares)
+                else:
+                    flush()
+                    current = (start, end, {section: end - start})
+                first = False
+    flush()
+    return chunks
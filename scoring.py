@@ -0,0 +1,223 @@
+"""Skill scoring that avoids LLM calls.
+
+Embedding-only scoring embeds skills once per process (persisted through the
+embedding cache) and scores them against a resume by a single skills x chunks
+cosine similarity matrix. The lexical pre-filter scans the resume text once
+for every skill and its aliases, settling obvious hits and misses before any
+skill is sent to the model.
+"""
+import functools
+import re
+import threading
+
+import numpy as np
+
+# Cosine similarity at or below the floor scores 0, at or above the ceiling scores 10,
+# linear in between. Tuned for short skill names against ~1000-character resume
+# chunks with text-embedding-3-small.
+FAST_SCORE_FLOOR = 0.20
+FAST_SCORE_CEILING = 0.50
+# Skills scored at or below this (out of 10) are missing; at or above STRENGTH_SCORE they are strengths.
+MISSING_SKILL_SCORE = 5
+STRENGTH_SCORE = 7
+
+
+def normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def distinct_rows(matrix, threshold):
+    """Indices of rows to keep, in order, dropping any row whose cosine similarity to a kept row is >= threshold."""
+    matrix = normalize_rows(matrix)
+    kept = []
+    for i, row in enumerate(matrix):
+        if not kept or float(np.max(matrix[kept] @ row)) < threshold:
+            kept.append(i)
+    return kept
+
+
+def similarity_to_score(similarity, floor=FAST_SCORE_FLOOR, ceiling=FAST_SCORE_CEILING):
+    """Map cosine similarities to 0-10 integer scores."""
+    scaled = (np.asarray(similarity) - floor) / (ceiling - floor)
+    return np.rint(np.clip(scaled, 0.0, 1.0) * 10).astype(int)
+
+
+def score_skills(skill_vectors, chunk_vectors, floor=FAST_SCORE_FLOOR, ceiling=FAST_SCORE_CEILING):
+    """Score each skill by its best-matching chunk.
+
+    Returns ``(scores, best_similarity, best_chunk)`` arrays with one entry per skill row.
+    """
+    similarity = normalize_rows(skill_vectors) @ normalize_rows(chunk_vectors).T
+    best_chunk = similarity.argmax(axis=1)
+    best_similarity = similarity[np.arange(len(best_chunk)), best_chunk]
+    return similarity_to_score(best_similarity, floor, ceiling), best_similarity, best_chunk
+
+
+def vectorstore_matrix(vectorstore):
+    """All vectors of a LangChain FAISS store as an (n, dim) array, in docstore order."""
+    index = vectorstore.index
+    return index.reconstruct_n(0, index.ntotal)
+
+
+class SkillVectors:
+    """Process-wide table of normalized skill embeddings, filled lazily or precomputed at startup."""
+
+    def __init__(self):
+        self._vectors = {}
+        self._lock = threading.Lock()
+
+    def matrix(self, skills, embeddings, model):
+        """Return an (n_skills, dim) matrix of normalized skill vectors, embedding any not seen yet."""
+        with self._lock:
+            missing = [skill for skill in dict.fromkeys(skills) if (model, skill) not in self._vectors]
+        if missing:
+            vectors = normalize_rows(embeddings.embed_documents(missing))
+            with self._lock:
+                for skill, vector in zip(missing, vectors):
+                    self._vectors[(model, skill)] = vector
+        with self._lock:
+            return np.stack([self._vectors[(model, skill)] for skill in skills])
+
+    def precompute(self, role_requirements, embeddings, model):
+        """Embed every skill of every role up front; returns the number of distinct skills."""
+        skills = list(dict.fromkeys(skill for skills in role_requirements.values() for skill in skills))
+        if skills:
+            self.matrix(skills, embeddings, model)
+        return len(skills)
+
+
+_skill_vectors = SkillVectors()
+
+
+def get_skill_vectors():
+    return _skill_vectors
+
+
+# Other names a skill commonly appears under in resumes, counted as mentions of it.
+SKILL_ALIASES = {
+    "AWS": ["Amazon Web Services"],
+    "Angular": ["AngularJS"],
+    "Apache Spark": ["Spark", "PySpark"],
+    "Azure": ["Microsoft Azure"],
+    "CI/CD": ["continuous integration", "continuous delivery", "continuous deployment", "GitHub Actions",
+              "GitLab CI", "Jenkins", "CircleCI"],
+    "CSS3": ["CSS"],
+    "Cloud services": ["AWS", "Azure", "GCP", "Google Cloud", "Amazon Web Services"],
+    "Cloud Services": ["AWS", "Azure", "GCP", "Google Cloud", "Amazon Web Services"],
+    "Computer Vision": ["OpenCV", "image classification", "object detection", "image segmentation"],
+    "DBT": ["dbt", "data build tool"],
+    "Deep Learning": ["neural network", "neural networks", "CNN", "RNN", "LSTM", "transformers"],
+    "Docker": ["Dockerfile", "containerization", "containerized"],
+    "FastAPI": ["Fast API"],
+    "GCP": ["Google Cloud", "Google Cloud Platform"],
+    "Git": ["GitHub", "GitLab", "Bitbucket"],
+    "Hugging Face": ["HuggingFace", "Hugging Face Transformers"],
+    "HTML5": ["HTML"],
+    "JavaScript": ["JS", "ECMAScript", "ES6"],
+    "Kafka": ["Apache Kafka"],
+    "Kubernetes": ["k8s", "kubectl", "EKS", "GKE", "AKS"],
+    "Machine Learning": ["ML"],
+    "MongoDB": ["Mongo"],
+    "NLP": ["natural language processing"],
+    "Next.js": ["NextJS"],
+    "Node.js": ["Node", "NodeJS"],
+    "NumPy": ["numpy"],
+    "PyTorch": ["torch"],
+    "REST APIs": ["REST", "RESTful", "REST API"],
+    "RESTful APIs": ["REST", "RESTful", "REST API"],
+    "React": ["React.js", "ReactJS"],
+    "Scikit-Learn": ["sklearn", "scikit learn"],
+    "Scikit-learn": ["sklearn", "scikit learn"],
+    "Site Reliability Engineering (SRE)": ["SRE", "site reliability"],
+    "Spring Boot": ["SpringBoot"],
+    "SQL": ["PostgreSQL", "Postgres", "MySQL", "T-SQL", "PL/SQL", "SQLite", "SQL Server"],
+    "SQL & NoSQL Databases": ["SQL", "NoSQL", "PostgreSQL", "Postgres", "MySQL", "SQLite", "MongoDB",
+                              "DynamoDB", "Cassandra", "Redis", "Elasticsearch"],
+    "Tailwind CSS": ["Tailwind", "TailwindCSS"],
+    "TensorFlow": ["tf.keras", "Keras"],
+    "Three.js": ["ThreeJS"],
+    "TypeScript": ["TS"],
+    "Vue": ["Vue.js", "VueJS"],
+}
+
+# Named tools and technologies are "literal": if none of their names (see SKILL_ALIASES)
+# appear in the resume text, the skill is taken as absent without asking the model. Every
+# other skill (Machine Learning, CI/CD, Leadership, Statistics, ...) can be evidenced
+# without being named, so it always goes to the model.
+TOOL_SKILLS = {
+    "Airflow", "Angular", "Ansible", "Apache Spark", "AWS", "AWS Glue", "Azure", "Azure Data Factory", "BigQuery",
+    "Bootstrap", "C#", "C++", "CSS3", "DBT", "Django", "Docker", "Elasticsearch", "Express", "FastAPI", "Flask",
+    "GCP", "Git", "Go", "Grafana", "GraphQL", "Hadoop", "Helm", "HTML5", "Hugging Face", "Java", "JavaScript",
+    "Jenkins", "Jupyter", "Kafka", "Kotlin", "Kubernetes", "Looker", "MongoDB", "Next.js", "Node.js", "NumPy",
+    "Pandas", "PHP", "Power BI", "Prometheus", "Python", "PyTorch", "RabbitMQ", "React", "Redis", "Redshift",
+    "Redux", "Ruby", "Rust", "Scala", "Scikit-learn", "Snowflake", "Spring Boot", "SQL", "Svelte", "Swift",
+    "Tableau", "Tailwind CSS", "TensorFlow", "Terraform", "Three.js", "TypeScript", "Vue", "WebAssembly", "gRPC",
+}
+
+# Literal skills mentioned at least this many times are scored without the model.
+LEXICAL_HIT_MIN_MENTIONS = 3
+LEXICAL_HIT_SCORE = 7
+
+
+class SkillMatcher:
+    """One compiled pattern covering every name of every skill in a role."""
+
+    def __init__(self, skills, aliases=None):
+        aliases = SKILL_ALIASES if aliases is None else aliases
+        self.skills = list(dict.fromkeys(skills))
+        literal = {self._normalize(skill) for skill in TOOL_SKILLS}
+        self._literal = {skill for skill in self.skills if self._normalize(skill) in literal}
+        self._term_skills = {}
+        for skill in self.skills:
+            for term in [skill, *aliases.get(skill, [])]:
+                self._term_skills.setdefault(self._normalize(term), set()).add(skill)
+        # Longest terms first so "Apache Spark" wins over "Spark" at the same position.
+        terms = sorted(self._term_skills, key=len, reverse=True)
+        alternatives = "|".join(r"\s+".join(re.escape(word) for word in term.split(" ")) for term in terms)
+        self._pattern = re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)", re.IGNORECASE)
+
+    @staticmethod
+    def _normalize(term):
+        return " ".join(term.split()).casefold()
+
+    def is_literal(self, skill):
+        return skill in self._literal
+
+    def scan(self, text):
+        """Count mentions of each skill in a single pass over the text."""
+        mentions = dict.fromkeys(self.skills, 0)
+        for match in self._pattern.finditer(text):
+            for skill in self._term_skills.get(self._normalize(match.group(0)), ()):
+                mentions[skill] += 1
+        return mentions
+
+    def triage(self, text, hit_min_mentions=LEXICAL_HIT_MIN_MENTIONS, hit_score=LEXICAL_HIT_SCORE):
+        """Split skills into lexically decided ones and ones that still need the model.
+
+        Returns ``(decided, ambiguous)`` where ``decided`` maps skill to ``(score, reasoning, path)``.
+        """
+        decided = {}
+        ambiguous = []
+        for skill, count in self.scan(text).items():
+            if not self.is_literal(skill):
+                ambiguous.append(skill)
+            elif count == 0:
+                decided[skill] = (0, f"No mention of {skill} or its common aliases in the resume.", "lexical_miss")
+            elif count >= hit_min_mentions:
+                decided[skill] = (hit_score, f"{skill} is mentioned {count} times in the resume.", "lexical_hit")
+            else:
+                ambiguous.append(skill)
+        return decided, ambiguous
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_matcher(skills):
+    return SkillMatcher(skills)
+
+
+def get_skill_matcher(skills):
+    """Return the matcher for a role's skill list, compiling it once per distinct list."""
+    return _cached_matcher(tuple(skills))
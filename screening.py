@@ -0,0 +1,291 @@
+"""Bulk screening: rank a batch of resumes against one role or job description.
+
+Example:
+    python screening.py resumes/ --role "Backend Engineer" --workers 8
+    python screening.py cv1.pdf cv2.pdf --jd job.txt --output run.jsonl --table run.csv
+
+Results are appended to a JSONL journal as each resume finishes, so an
+interrupted run picks up where it left off when started again with the same
+output file. Rows record the role or JD they were scored against, so one
+journal can hold runs against several targets. The ranked table is written once the batch is done, and the
+results are added to the results store (see ``results.py``) for later
+ranking and filtering across runs.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from agents import ResumeAnalysisAgent, warm_up
+from extraction import EmptyDocumentError
+from metrics import registry
+from results import RESULTS_DB, ResultsStore, jd_target, role_target
+from roles import ROLE_REQUIREMENTS
+
+RESUME_EXTENSIONS = (".pdf", ".txt")
+
+
+def find_resumes(sources):
+    """Expand directories into the resume files they contain; files are passed through."""
+    for source in sources:
+        if os.path.isdir(source):
+            for root, _, files in sorted(os.walk(source)):
+                for name in sorted(files):
+                    if name.lower().endswith(RESUME_EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            yield source
+
+
+def file_digest(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_journal(output_path, target=None):
+    """Read the rows already written to a JSONL journal, keyed by resume digest.
+
+    With ``target`` (see ``screening_target``), only rows scored against that role or JD are read.
+    """
+    rows = {}
+    if output_path and os.path.exists(output_path):
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    # A partially written last line from an interrupted run.
+                    continue
+                if target is None or row.get("target") == target:
+                    rows[row["digest"]] = row
+    return rows
+
+
+def screening_target(role=None, jd_path=None):
+    """``(target key, label)`` of the role or JD file a batch is screened against."""
+    if role is not None:
+        return role_target(role), role
+    with open(jd_path, "rb") as f:
+        return jd_target(f.read()), os.path.basename(jd_path)
+
+
+def screen_one(path, digest, api_key, role_requirements=None, jd_profile=None, cutoff_score=75, **agent_kwargs):
+    """Analyze a single resume with a throwaway agent and return a compact result row."""
+    agent = ResumeAnalysisAgent(api_key=api_key, cutoff_score=cutoff_score, **agent_kwargs)
+    started = time.perf_counter()
+    row = {"file": path, "digest": digest}
+    try:
+        result = agent.analyze_resume(path, role_requirements=role_requirements, jd_profile=jd_profile)
+        row.update({
+            "overall_score": result["overall_score"],
+            "selected": result["selected"],
+            "skill_scores": result["skill_scores"],
+            "strengths": result["strengths"],
+            "missing_skills": result["missing_skills"],
+            "error": None,
+        })
+    except Exception as e:
+        row.update({"overall_score": None, "selected": False, "error": str(e), "error_type": type(e).__name__})
+    finally:
+        agent.cleanup()
+    row["seconds"] = round(time.perf_counter() - started, 3)
+    row["stage_seconds"] = {stage: round(total["seconds"], 3) for stage, total in agent.trace.summary().items()}
+    return row
+
+
+def iter_screening(resumes, api_key, role=None, jd_path=None, output_path=None, workers=4,
+                   cutoff_score=75, store=None, **agent_kwargs):
+    """Screen resumes concurrently and yield each result row as soon as it finishes.
+
+    At most ``2 * workers`` resumes are in flight at a time, so memory does not
+    grow with the size of the batch. Resumes already in the journal at
+    ``output_path`` for the same role or JD are skipped. Rows are also saved to the results
+    ``store`` (a ``results.ResultsStore``) if one is given.
+    """
+    if role is None and jd_path is None:
+        raise ValueError("Either a role or a job description file is required.")
+    if role is not None and role not in ROLE_REQUIREMENTS:
+        raise ValueError(f"Unknown role: {role}")
+    role_requirements = ROLE_REQUIREMENTS[role] if role is not None else None
+    jd_profile = None
+    target, label = screening_target(role, jd_path)
+    if jd_path is not None:
+        # Extract and profile the JD once for the whole batch.
+        profiler = ResumeAnalysisAgent(api_key=api_key, **agent_kwargs)
+        jd_text = profiler.extract_text_from_file(jd_path)
+        if not jd_text.strip():
+            raise EmptyDocumentError("The job description contains no extractable text.")
+        jd_profile = profiler.profile_job_description(jd_text)
+    # Failed resumes are retried on the next run; only successful rows count as done.
+    done = {digest for digest, row in load_journal(output_path, target).items() if row.get("error") is None}
+
+    journal = open(output_path, "a", encoding="utf-8") if output_path else None
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for path in resumes:
+                digest = file_digest(path)
+                if digest in done:
+                    continue
+                done.add(digest)
+                pending.add(executor.submit(
+                    screen_one, path, digest, api_key, role_requirements, jd_profile, cutoff_score, **agent_kwargs
+                ))
+                if len(pending) >= 2 * workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        yield _record(journal, future.result(), store, target, label)
+            for future in wait(pending).done:
+                yield _record(journal, future.result(), store, target, label)
+    finally:
+        if journal:
+            journal.close()
+
+
+def _record(journal, row, store=None, target=None, label=None):
+    row["target"] = target
+    if journal:
+        journal.write(json.dumps(row) + "\n")
+        journal.flush()
+    if store is not None:
+        store.add(target, row, label)
+    return row
+
+
+def rank_results(rows):
+    """Sort result rows by overall score, best first, with failed resumes last."""
+    return sorted(rows, key=lambda row: (row.get("error") is not None, -(row.get("overall_score") or 0)))
+
+
+def write_table(rows, table_path):
+    with open(table_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "file", "overall_score", "selected", "strengths", "missing_skills", "error"])
+        for rank, row in enumerate(rows, 1):
+            writer.writerow([
+                rank,
+                row["file"],
+                row.get("overall_score"),
+                row.get("selected"),
+                "; ".join(row.get("strengths") or []),
+                "; ".join(row.get("missing_skills") or []),
+                row.get("error") or "",
+            ])
+
+
+def peak_memory_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def screen_resumes(sources, api_key, role=None, jd_path=None, output_path="screening_results.jsonl",
+                   table_path="screening_results.csv", workers=4, cutoff_score=75, on_result=None, store=None,
+                   **agent_kwargs):
+    """Screen every resume under ``sources`` and write a ranked table.
+
+    Returns ``(ranked_rows, stats)``; ``on_result`` is called with each new row as it finishes.
+    """
+    started = time.perf_counter()
+    processed = 0
+    failed = 0
+    rows = iter_screening(find_resumes(sources), api_key, role=role, jd_path=jd_path, output_path=output_path,
+                          workers=workers, cutoff_score=cutoff_score, store=store, **agent_kwargs)
+    collected = []
+    for row in rows:
+        processed += 1
+        failed += row["error"] is not None
+        if not output_path:
+            collected.append(row)
+        if on_result:
+            on_result(row)
+    elapsed = time.perf_counter() - started
+
+    target = screening_target(role, jd_path)[0]
+    ranked = rank_results(load_journal(output_path, target).values() if output_path else collected)
+    if table_path:
+        write_table(ranked, table_path)
+    stats = {
+        "processed": processed,
+        "failed": failed,
+        "total_ranked": len(ranked),
+        "elapsed_seconds": round(elapsed, 2),
+        "resumes_per_minute": round(processed / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "peak_memory_mb": peak_memory_mb(),
+    }
+    return ranked, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank a batch of resumes against a role or job description.")
+    parser.add_argument("sources", nargs="+", help="Resume files or directories containing PDF/TXT resumes.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--role", choices=sorted(ROLE_REQUIREMENTS), help="Predefined role to screen against.")
+    target.add_argument("--jd", help="Job description file (PDF or TXT) to screen against.")
+    parser.add_argument("--output", default="screening_results.jsonl", help="JSONL journal of per-resume results.")
+    parser.add_argument("--table", default="screening_results.csv", help="Ranked CSV table written at the end.")
+    parser.add_argument("--store", default=RESULTS_DB,
+                        help="SQLite results store to add the results to, for querying with results.py.")
+    parser.add_argument("--no-store", dest="store", action="store_const", const=None,
+                        help="Do not add the results to a results store.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of resumes analyzed concurrently.")
+    parser.add_argument("--cutoff", type=int, default=75, help="Overall score needed to be selected.")
+    parser.add_argument("--scoring-mode", choices=["batch", "per_skill", "fast"], default="batch",
+                        help="Skill scoring strategy; 'fast' uses embeddings only, with no LLM calls.")
+    parser.add_argument("--pdf-workers", type=int, default=None,
+                        help="Processes used to extract pages of long PDFs (default: in-process).")
+    parser.add_argument("--api-key", default=None, help="EURI API key (defaults to $EURI_API_KEY).")
+    parser.add_argument("--metrics-out", default=None,
+                        help="Write stage timings and counters for the run here (.prom for Prometheus text, else JSON).")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    api_key = args.api_key or os.environ.get("EURI_API_KEY")
+    if not api_key:
+        parser.error("an API key is required (--api-key or EURI_API_KEY)")
+    warm_up(api_key)
+
+    def report(row):
+        if row["error"]:
+            print(f"✗ {row['file']}: {row['error']}", flush=True)
+        else:
+            print(f"✓ {row['file']}: {row['overall_score']}% ({row['seconds']}s)", flush=True)
+
+    if args.scoring_mode == "fast":
+        ResumeAnalysisAgent(api_key=api_key).precompute_skill_vectors(ROLE_REQUIREMENTS)
+    ranked, stats = screen_resumes(
+        args.sources, api_key, role=args.role, jd_path=args.jd, output_path=args.output,
+        table_path=args.table, workers=args.workers, cutoff_score=args.cutoff, on_result=report,
+        store=ResultsStore(args.store) if args.store else None, scoring_mode=args.scoring_mode,
+        pdf_workers=args.pdf_workers
+    )
+    memory = f", peak memory {stats['peak_memory_mb']:.0f} MB" if stats["peak_memory_mb"] is not None else ""
+    print(
+        f"\nScreened {stats['processed']} new resumes ({stats['failed']} failed) in {stats['elapsed_seconds']}s "
+        f"- {stats['resumes_per_minute']} resumes/min{memory}."
+    )
+    print(f"Ranked {stats['total_ranked']} candidates -> {args.table}")
+    if args.store:
+        print(f"Results stored in {args.store}; query them with results.py")
+    if args.metrics_out:
+        prometheus = args.metrics_out.endswith(".prom")
+        with open(args.metrics_out, "w", encoding="utf-8") as f:
+            f.write(registry.render_prometheus() if prometheus else registry.render_json())
+        print(f"Metrics -> {args.metrics_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""Headless HTTP service for resume screening, for ATS integrations.
+
+    python service.py --workers 4 --queue-size 100
+    python service.py --stub                 # answer from the local stub backend
+
+Every request becomes a job on a bounded queue, served by a pool of workers;
+clients submit, then poll ``GET /jobs/{job_id}`` (``?wait=`` long-polls).
+Job ids are derived from the uploaded files and parameters, so resubmitting
+the same request returns the existing job instead of redoing the work.
+
+    POST /analyze                         multipart: resume, jd (optional), role, scoring_mode
+    POST /analyses/{analysis_id}/ask      {"question": "...", "sections": ["skills", "experience"]}
+    POST /analyses/{analysis_id}/improve  {"improvement_areas": [...], "target_role": "..."}
+    POST /analyses/{analysis_id}/rewrite  {"target_role": "...", "highlight_skills": [...]}
+    GET  /jobs/{job_id}
+    GET  /candidates?role=...&k=20&skill=Python:7  stored results, best first
+    GET  /candidates/sweep?role=...&cutoff=60&cutoff=70
+    GET  /health, /metrics
+
+``analysis_id`` is the job id returned by ``/analyze``. A full queue answers
+503 with ``Retry-After``.
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, Query, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel
+
+from agents import DEFAULT_IMPROVEMENT_AREAS, SCORING_MODES, ResumeAnalysisAgent, warm_up
+from metrics import logger, registry
+from results import DEFAULT_CUTOFF, RESULTS_DB, ResultsStore, jd_target, role_target
+from roles import ROLE_REQUIREMENTS
+from sessions import get_session_manager
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+# Finished jobs kept for polling; the oldest are forgotten first.
+MAX_JOBS = 10_000
+MAX_WAIT_SECONDS = 30
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class AnalysisExpiredError(Exception):
+    """The analysis exists but its agent was released; submit it again."""
+
+
+def _digest(*parts):
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part if isinstance(part, bytes) else json.dumps(part, sort_keys=True).encode("utf-8"))
+        sha.update(b"\0")
+    return sha.hexdigest()[:32]
+
+
+def _upload(name, data):
+    """In-memory file carrying the upload's name, as the extractors expect."""
+    buffer = io.BytesIO(data)
+    buffer.name = name
+    return buffer
+
+
+class Job:
+    def __init__(self, job_id, kind, run, analysis_id=None):
+        self.id = job_id
+        self.kind = kind
+        self.run = run
+        self.analysis_id = analysis_id
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.error_type = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.finished = asyncio.Event()
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "analysis_id": self.analysis_id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "error_type": self.error_type,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ScreeningService:
+    """Job queue and worker pool around ``ResumeAnalysisAgent``; must be started inside an event loop."""
+
+    def __init__(self, api_key, workers=4, queue_size=100, max_jobs=MAX_JOBS, results_store=None, **agent_kwargs):
+        self.api_key = api_key
+        # Finished analyses are added here, if given, for /candidates queries.
+        self.results_store = results_store
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_jobs = max_jobs
+        self.agent_kwargs = agent_kwargs
+        self.sessions = get_session_manager()
+        self._jobs = OrderedDict()
+        self._agents = {}
+        self._agents_lock = threading.Lock()
+        self._queue = None
+        self._tasks = []
+        self._executor = None
+        self.running = 0
+        self.rejected = 0
+
+    async def start(self):
+        # Load the analysis dependencies while the server starts accepting requests.
+        warm_up(self.api_key)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="screening-worker")
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        registry.register_collector("service", self.stats)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+        for job in list(self._jobs.values()):
+            counts[job.status] += 1
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_size": self.queue_size,
+            "workers": self.workers,
+            "running": self.running,
+            "rejected": self.rejected,
+            "analyses_loaded": len(self._agents),
+            **{f"jobs_{status}": count for status, count in counts.items()},
+        }
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _submit(self, job_id, kind, run, analysis_id=None):
+        """Queue a job, or return the existing one with this id; returns ``(job, created)``."""
+        existing = self._jobs.get(job_id)
+        if existing is not None and existing.status != FAILED:
+            if kind != "analyze" or existing.status != DONE or job_id in self._agents:
+                return existing, False
+        job = Job(job_id, kind, run, analysis_id)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError(f"The job queue is full ({self.queue_size} jobs).")
+        self._jobs[job_id] = job
+        self._jobs.move_to_end(job_id)
+        self._forget_old_jobs()
+        return job, True
+
+    def _forget_old_jobs(self):
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status in (DONE, FAILED):
+                del self._jobs[job_id]
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            job.status, job.started_at = RUNNING, time.time()
+            self.running += 1
+            try:
+                job.result = await loop.run_in_executor(self._executor, job.run)
+                job.status = DONE
+            except Exception as e:
+                logger.warning("Job %s (%s) failed: %s", job.id, job.kind, e)
+                job.status, job.error, job.error_type = FAILED, str(e), type(e).__name__
+            finally:
+                self.running -= 1
+                job.finished_at = time.time()
+                job.run = None
+                registry.observe_stage(f"service.{job.kind}", job.finished_at - job.started_at, job.status == FAILED)
+                registry.observe_stage("service.queue_wait", job.started_at - job.created_at)
+                job.finished.set()
+                self._queue.task_done()
+
+    def analyze(self, resume_name, resume_data, jd_name=None, jd_data=None, role=None, scoring_mode=None):
+        if jd_data is None and role not in ROLE_REQUIREMENTS:
+            roles = ", ".join(sorted(ROLE_REQUIREMENTS))
+            raise ValueError(f"Unknown role {role!r}; send a JD file or one of: {roles}.")
+        if scoring_mode and scoring_mode not in SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode {scoring_mode!r}; use one of: {', '.join(SCORING_MODES)}.")
+        agent_kwargs = dict(self.agent_kwargs)
+        if scoring_mode:
+            agent_kwargs["scoring_mode"] = scoring_mode
+        job_id = _digest(resume_data, jd_data or b"", role if jd_data is None else None, agent_kwargs)
+
+        def run():
+            agent = ResumeAnalysisAgent(api_key=self.api_key, **agent_kwargs)
+            result = agent.analyze_resume(
+                _upload(resume_name, resume_data),
+                role_requirements=ROLE_REQUIREMENTS[role] if jd_data is None else None,
+                custom_jd=_upload(jd_name, jd_data) if jd_data is not None else None,
+            )
+            with self._agents_lock:
+                self._agents[job_id] = agent
+            self.sessions.attach(job_id, agent, on_release=lambda: self._forget_agent(job_id))
+            if self.results_store is not None:
+                target, label = (role_target(role), role) if jd_data is None else (jd_target(jd_data), jd_name)
+                row = {"file": resume_name, "digest": hashlib.sha256(resume_data).hexdigest(), **result}
+                self.results_store.add(target, row, label)
+            return result
+
+        return self._submit(job_id, "analyze", run)
+
+    def _forget_agent(self, analysis_id):
+        with self._agents_lock:
+            self._agents.pop(analysis_id, None)
+
+    def follow_up(self, analysis_id, kind, params):
+        """Queue an ``ask``, ``improve`` or ``rewrite`` job on a finished analysis."""
+        analysis = self._jobs.get(analysis_id)
+        if analysis is None or analysis.kind != "analyze":
+            raise LookupError(f"No analysis {analysis_id}.")
+        if analysis.status != DONE:
+            raise RuntimeError(f"Analysis {analysis_id} is {analysis.status}.")
+        with self._agents_lock:
+            agent = self._agents.get(analysis_id)
+        if agent is None:
+            raise AnalysisExpiredError(f"Analysis {analysis_id} has expired; submit the resume again.")
+
+        def run():
+            self.sessions.attach(analysis_id, agent, on_release=lambda: self._forget_agent(analysis_id))
+            if kind == "ask":
+                return {"answer": agent.ask_question(params["question"], sections=params["sections"])}
+            if kind == "improve":
+                return agent.improve_resume(params["improvement_areas"], params["target_role"])
+            skills = params["highlight_skills"]
+            if skills is None:
+                skills = agent.default_highlight_skills()
+            return {"improved_resume": agent.get_improved_resume(params["target_role"], skills)}
+
+        return self._submit(_digest(analysis_id, kind, params), kind, run, analysis_id=analysis_id)
+
+
+class AskRequest(BaseModel):
+    question: str
+    # Resume sections to search, e.g. ["skills", "experience"]; all of them if omitted.
+    sections: Optional[List[str]] = None
+
+
+class ImproveRequest(BaseModel):
+    improvement_areas: List[str] = list(DEFAULT_IMPROVEMENT_AREAS)
+    target_role: str = ""
+
+
+class RewriteRequest(BaseModel):
+    target_role: str = ""
+    highlight_skills: Optional[List[str]] = None
+
+
+def create_app(service):
+    @asynccontextmanager
+    async def lifespan(app):
+        await service.start()
+        yield
+        await service.stop()
+
+    app = FastAPI(title="MWASIQ AI Recruitment Agent", lifespan=lifespan)
+
+    def accepted(submitted):
+        job, created = submitted
+        body = {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+        return JSONResponse(body, status_code=202 if created else 200)
+
+    def queue(submit, *args):
+        try:
+            return accepted(submit(*args))
+        except QueueFullError as e:
+            raise HTTPException(503, str(e), headers={"Retry-After": "1"})
+        except ValueError as e:
+            raise HTTPException(422, str(e))
+        except LookupError as e:
+            raise HTTPException(404, str(e))
+        except AnalysisExpiredError as e:
+            raise HTTPException(410, str(e))
+        except RuntimeError as e:
+            raise HTTPException(409, str(e))
+
+    @app.post("/analyze")
+    async def analyze(resume: UploadFile = File(...), jd: Optional[UploadFile] = File(None),
+                      role: Optional[str] = Form(None), scoring_mode: Optional[str] = Form(None)):
+        resume_data = await resume.read()
+        jd_data = await jd.read() if jd is not None else None
+        return queue(service.analyze, resume.filename, resume_data, jd.filename if jd else None, jd_data, role,
+                     scoring_mode)
+
+    @app.post("/analyses/{analysis_id}/ask")
+    async def ask(analysis_id: str, request: AskRequest):
+        return queue(service.follow_up, analysis_id, "ask", request.model_dump())
+
+    @app.post("/analyses/{analysis_id}/improve")
+    async def improve(analysis_id: str, request: ImproveRequest):
+        return queue(service.follow_up, analysis_id, "improve", request.model_dump())
+
+    @app.post("/analyses/{analysis_id}/rewrite")
+    async def rewrite(analysis_id: str, request: RewriteRequest):
+        return queue(service.follow_up, analysis_id, "rewrite", request.model_dump())
+
+    @app.get("/jobs/{job_id}")
+    async def job_status(job_id: str, wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS)):
+        job = service.get(job_id)
+        if job is None:
+            raise HTTPException(404, f"No job {job_id}.")
+        if wait and job.status in (QUEUED, RUNNING):
+            try:
+                await asyncio.wait_for(job.finished.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+        return job.to_dict()
+
+    def results_target(role, target):
+        if service.results_store is None:
+            raise HTTPException(404, "The service runs without a results store.")
+        if role is None and target is None:
+            raise HTTPException(422, "Pass a role, or a target key from /candidates/targets.")
+        return role_target(role) if role is not None else target
+
+    @app.get("/candidates")
+    async def candidates(role: Optional[str] = None, target: Optional[str] = None, k: int = Query(20, ge=1, le=1000),
+                         min_score: Optional[int] = None, skill: List[str] = Query([]), cutoff: int = DEFAULT_CUTOFF):
+        key = results_target(role, target)
+        skills = {}
+        for spec in skill:
+            name, _, minimum = spec.rpartition(":")
+            if not name or not minimum.isdigit():
+                raise HTTPException(422, f"Expected skill=SKILL:SCORE, got {spec!r}.")
+            skills[name] = int(minimum)
+        store = service.results_store
+        return {
+            "target": key,
+            "matches": store.count(key, min_score, skills),
+            "candidates": store.top(key, k, min_score=min_score, skills=skills, cutoff=cutoff),
+        }
+
+    @app.get("/candidates/sweep")
+    async def cutoff_sweep(role: Optional[str] = None, target: Optional[str] = None,
+                           cutoff: List[int] = Query(list(range(50, 100, 5)))):
+        key = results_target(role, target)
+        return {"target": key, "sweep": service.results_store.cutoff_sweep(key, cutoff)}
+
+    @app.get("/candidates/targets")
+    async def targets():
+        if service.results_store is None:
+            raise HTTPException(404, "The service runs without a results store.")
+        return service.results_store.targets()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", **service.stats()}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics(format: str = "prometheus"):
+        return registry.render_json() if format == "json" else registry.render_prometheus()
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the resume screening HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4, help="Jobs processed concurrently.")
+    parser.add_argument("--queue-size", type=int, default=100, help="Jobs waiting before requests get 503.")
+    parser.add_argument("--scoring-mode", choices=SCORING_MODES, default="batch")
+    parser.add_argument("--api-key", default=None, help="EURI API key (defaults to $EURI_API_KEY).")
+    parser.add_argument("--stub", action="store_true", help="Serve from the local stub backend instead of the API.")
+    parser.add_argument("--store", default=RESULTS_DB, help="SQLite results store that analyses are added to.")
+    parser.add_argument("--no-store", dest="store", action="store_const", const=None,
+                        help="Do not keep analysis results in a results store.")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    from dotenv import load_dotenv
+    load_dotenv()
+    api_key = args.api_key or os.environ.get("EURI_API_KEY")
+    if args.stub:
+        import llm_client
+        from stub_backend import start_stub_server
+        _, llm_client.EURI_BASE_URL = start_stub_server()
+        api_key = api_key or "stub"
+    if not api_key:
+        parser.error("an API key is required (--api-key or EURI_API_KEY), or use --stub")
+
+    service = ScreeningService(api_key, workers=args.workers, queue_size=args.queue_size,
+                               results_store=ResultsStore(args.store) if args.store else None,
+                               scoring_mode=args.scoring_mode)
+    uvicorn.run(create_app(service), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Process-wide bookkeeping of per-session agents.
+
+Every Streamlit session keeps its own ``ResumeAnalysisAgent``. ``SessionManager``
+tracks them in least-recently-used order and keeps the process within a memory
+budget by releasing the vector indexes of idle sessions' agents, which rebuild
+them from the embedding cache when next used. It also keeps the cache
+directory within a disk budget and releases sessions that have ended.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cache
+from cache import get_embedding_cache, get_response_cache
+from metrics import logger, registry
+
+MEMORY_BUDGET_MB = float(os.environ.get("RECRUITMENT_AGENT_MEMORY_MB", 256))
+DISK_BUDGET_MB = float(os.environ.get("RECRUITMENT_AGENT_DISK_MB", 1024))
+# Sessions unused for this long lose their index, or are treated as ended if connections cannot be checked.
+SESSION_TTL = 2 * 3600
+# Walking the cache directory is cheap but not free; check it at most this often.
+DISK_CHECK_INTERVAL = 60
+
+
+def directory_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class SessionManager:
+    def __init__(self, memory_budget_mb=MEMORY_BUDGET_MB, disk_budget_mb=DISK_BUDGET_MB, session_ttl=SESSION_TTL,
+                 is_active=None):
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.disk_budget = disk_budget_mb * 1024 * 1024
+        self.session_ttl = session_ttl
+        # Optional callable telling whether a session id is still connected.
+        self.is_active = is_active
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_checked = 0.0
+        self._disk_bytes = 0
+        self.index_evictions = 0
+        self.cache_shrinks = 0
+        self.sessions_released = 0
+
+    def attach(self, session_id, agent, on_release=None):
+        """Record that ``session_id`` is using ``agent`` now, then enforce the budgets.
+
+        ``on_release`` is called when the session is released, e.g. to stop its background work.
+        """
+        with self._lock:
+            self._sessions[session_id] = {"agent": agent, "last_used": time.time(), "on_release": on_release}
+            self._sessions.move_to_end(session_id)
+        self.sweep()
+        self.enforce_memory(current=session_id)
+        self.enforce_disk()
+
+    def release(self, session_id):
+        """Forget a session and free everything its agent holds."""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return
+        if entry["on_release"] is not None:
+            try:
+                entry["on_release"]()
+            except Exception:
+                logger.exception("Releasing session %s failed", session_id)
+        entry["agent"].cleanup()
+        self.sessions_released += 1
+
+    def release_all(self):
+        with self._lock:
+            session_ids = list(self._sessions)
+        for session_id in session_ids:
+            self.release(session_id)
+
+    def sweep(self):
+        """Release sessions that have ended and drop the indexes of sessions idle longer than the TTL.
+
+        With ``is_active``, a session has ended only once it disconnects; an idle but connected session
+        keeps its resume and just loses its index, which is rebuilt when next used. Without it, sessions
+        idle longer than the TTL are treated as ended.
+        """
+        cutoff = time.time() - self.session_ttl
+        with self._lock:
+            entries = list(self._sessions.items())
+        for session_id, entry in entries:
+            idle = entry["last_used"] < cutoff
+            if self.is_active is None:
+                ended = idle
+            else:
+                try:
+                    ended = not self.is_active(session_id)
+                except Exception:
+                    ended = False
+            if ended:
+                self.release(session_id)
+            elif idle and entry["agent"].release_index():
+                self.index_evictions += 1
+
+    def enforce_memory(self, current=None):
+        """Release indexes of the least recently used agents, other than ``current``'s, until within budget."""
+        with self._lock:
+            entries = list(self._sessions.items())
+        total = sum(entry["agent"].memory_usage()["total_bytes"] for _, entry in entries)
+        for session_id, entry in entries:
+            if total <= self.memory_budget:
+                break
+            if session_id == current:
+                continue
+            freed = entry["agent"].release_index()
+            if freed:
+                total -= freed
+                self.index_evictions += 1
+        return total
+
+    def enforce_disk(self, force=False):
+        """Shrink the embedding and response caches while the cache directory is over the disk budget."""
+        now = time.time()
+        if not force and now - self._disk_checked < DISK_CHECK_INTERVAL:
+            return self._disk_bytes
+        self._disk_checked = now
+        size = directory_bytes(cache.CACHE_DIR)
+        while size > self.disk_budget:
+            removed = get_embedding_cache().shrink() + get_response_cache().shrink()
+            self.cache_shrinks += 1
+            new_size = directory_bytes(cache.CACHE_DIR)
+            if not removed or new_size >= size:
+                # What is left (e.g. the candidate corpus) is not ours to delete.
+                logger.warning("Cache directory is %.0f MB, over the %.0f MB budget", new_size / 2**20,
+                               self.disk_budget / 2**20)
+                size = new_size
+                break
+            size = new_size
+        self._disk_bytes = size
+        return size
+
+    def usage(self):
+        with self._lock:
+            agents = [entry["agent"] for entry in self._sessions.values()]
+        memory = [agent.memory_usage() for agent in agents]
+        return {
+            "sessions": len(agents),
+            "indexes_loaded": sum(1 for m in memory if m["index_bytes"]),
+            "memory_mb": round(sum(m["total_bytes"] for m in memory) / 2**20, 2),
+            "memory_budget_mb": round(self.memory_budget / 2**20, 2),
+            "disk_mb": round(self._disk_bytes / 2**20, 2),
+            "disk_budget_mb": round(self.disk_budget / 2**20, 2),
+            "index_evictions": self.index_evictions,
+            "cache_shrinks": self.cache_shrinks,
+            "sessions_released": self.sessions_released,
+        }
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_session_manager(**kwargs):
+    """Return the process-wide session manager, creating it with ``kwargs`` on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SessionManager(**kwargs)
+            registry.register_collector("sessions", _manager.usage)
+        return _manager
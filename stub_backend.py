@@ -0,0 +1,194 @@
+"""Local stand-in for the Euriai API, for tests and offline runs.
+
+Serves ``/chat/completions`` and ``/embeddings`` with deterministic responses:
+
+    python stub_backend.py --port 8765
+    EURI_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+
+Embeddings are hashed bag-of-words vectors, so texts sharing words are close.
+Completions answer batched skill-scoring and JD-profile prompts with valid
+JSON and return a fixed echo for anything else. ``--latency``, ``--jitter``,
+``--token-latency`` and ``--error-rate`` make it behave like a slow or flaky
+API for benchmarking (see ``benchmark.py``).
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from roles import ROLE_REQUIREMENTS
+
+EMBEDDING_DIM = 256
+
+
+def stub_embedding(text, dim=EMBEDDING_DIM):
+    vector = [0.0] * dim
+    for word in re.findall(r"\w+", text.lower()):
+        digest = hashlib.md5(word.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def stub_completion(prompt):
+    if "Respond with JSON only" in prompt and "Skills:\n" in prompt:
+        excerpts, _, rest = prompt.partition("Skills:\n")
+        excerpts = excerpts.lower()
+        skills = [line[2:].strip() for line in rest.splitlines() if line.startswith("- ")]
+        return json.dumps({
+            skill: {
+                "score": 8 if skill.lower() in excerpts else 2,
+                "reasoning": "Mentioned in the resume." if skill.lower() in excerpts else "No evidence found.",
+            }
+            for skill in skills
+        })
+    if "Respond with JSON only, as a list of strings" in prompt:
+        header = re.match(r"Write (\d+) \w+ (\w+)", prompt)
+        count, kind = (int(header.group(1)), header.group(2)) if header else (3, "general")
+        excerpts = prompt.partition("Resume excerpts:")[2].rpartition("Respond with JSON only")[0]
+        words = sorted(set(re.findall(r"[A-Za-z][\w+#-]{3,}", excerpts))) or ["your work"]
+        openers = ["How did you approach", "What was hardest about", "What would you change in",
+                   "How did you measure success with", "Who did you work with on"]
+        return json.dumps([
+            f"{kind.capitalize()}: {openers[i % len(openers)]} {words[(i * 7 + len(kind)) % len(words)]}?"
+            for i in range(count)
+        ])
+    if prompt.startswith("Extract the skills this job description asks for"):
+        jd = prompt.partition("Job description:\n")[2].rpartition("Respond with JSON only")[0].lower()
+        known = dict.fromkeys(skill for skills in ROLE_REQUIREMENTS.values() for skill in skills)
+        found = [skill for skill in known if re.search(rf"(?<!\w){re.escape(skill.lower())}(?!\w)", jd)]
+        return json.dumps({
+            "required": [{"skill": skill, "weight": 3 if i < 3 else 2} for i, skill in enumerate(found[:8])],
+            "nice_to_have": [{"skill": skill, "weight": 1} for skill in found[8:12]],
+        })
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    return f"Stub response {digest}. This answer was generated by the local stub backend."
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded stub server with simulated latency and failures.
+
+    Each request waits ``latency`` seconds plus up to ``jitter`` more, and fails
+    with HTTP 503 with probability ``error_rate``. Streamed completions also
+    wait ``token_latency`` seconds between chunks.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, token_latency=0.0, error_rate=0.0, seed=None):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.request_count = 0
+        self.error_count = 0
+
+    def simulate(self):
+        """Sleep for the simulated latency; return True if this request should fail."""
+        with self._random_lock:
+            self.request_count += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+            self.error_count += int(failed)
+        if delay > 0:
+            time.sleep(delay)
+        return failed
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, text):
+        """Send the completion as server-sent events, one word per chunk."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = re.findall(r"\S+\s*", text)
+        events = [{"choices": [{"index": 0, "delta": {"content": word}}]} for word in words]
+        try:
+            for event in [json.dumps(e) for e in events] + ["[DONE]"]:
+                data = f"data: {event}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+                if self.server.token_latency:
+                    time.sleep(self.server.token_latency)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled the stream.
+            self.close_connection = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.server.simulate():
+            self._send_json(503, {"error": "Simulated upstream failure"})
+        elif self.path.endswith("/chat/completions") and payload.get("stream"):
+            self._send_stream(stub_completion(payload["messages"][-1]["content"]))
+        elif self.path.endswith("/chat/completions"):
+            prompt = payload["messages"][-1]["content"]
+            self._send_json(200, {
+                "model": payload.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": stub_completion(prompt)}}],
+            })
+        elif self.path.endswith("/embeddings"):
+            inputs = payload["input"]
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            self._send_json(200, {
+                "model": payload.get("model"),
+                "data": [{"index": i, "embedding": stub_embedding(text)} for i, text in enumerate(inputs)],
+            })
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+
+def start_stub_server(host="127.0.0.1", port=0, **behaviour):
+    """Start the stub on a background thread and return ``(server, base_url)``.
+
+    ``behaviour`` is passed to ``StubServer`` (latency, jitter, token_latency, error_rate, seed).
+    """
+    server = StubServer((host, port), **behaviour)
+    threading.Thread(target=server.serve_forever, name="euri-stub", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local stub of the Euriai API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds, at random.")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Seconds between streamed chunks.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency jitter and injected errors.")
+    args = parser.parse_args(argv)
+    server = StubServer(
+        (args.host, args.port), latency=args.latency, jitter=args.jitter,
+        token_latency=args.token_latency, error_rate=args.error_rate, seed=args.seed
+    )
+    print(f"Stub Euriai backend listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,24 @@
+import json
+import time
+
 import streamlit as st
 
+def _render_stream(chunks):
+    """Write a token stream as it arrives and report time to first token; returns the full text."""
+    started = time.perf_counter()
+    first_token = []
+
+    def timed():
+        for chunk in chunks:
+            if not first_token:
+                first_token.append(time.perf_counter() - started)
+            yield chunk
+
+    text = st.write_stream(timed())
+    if first_token:
+        st.caption(f"⏱️ First token in {first_token[0]:.2f}s")
+    return text if isinstance(text, str) else "".join(map(str, text or []))
+
 def setup_page():
     st.title("🚀 MWASIQ AI Recruitment Agent")
     st.caption("Your AI assistant for resume analysis, Q&A, interview preparation, and improvement suggestions.")
@@ -10,7 +29,77 @@ def display_header():
 def setup_sidebar():
     st.sidebar.title("⚙️ Configuration")
     euri_api_key = st.sidebar.text_input("🔑 Enter your EURI API Key", type="password")
-    return {"euri_api_key": euri_api_key}
+    scoring_modes = {
+        "Batched LLM (default)": "batch",
+        "Per-skill LLM": "per_skill",
+        "Fast (embeddings only)": "fast",
+    }
+    scoring_label = st.sidebar.selectbox("🧮 Skill scoring mode", list(scoring_modes.keys()))
+    prefetch_budget = st.sidebar.slider(
+        "⚡ Prefetch budget (tokens)", min_value=0, max_value=20000, value=6000, step=1000,
+        help="After an analysis, suggestions and a rewrite are prepared in the background "
+             "up to this many estimated tokens. Set to 0 to turn prefetching off."
+    )
+    return {
+        "euri_api_key": euri_api_key,
+        "scoring_mode": scoring_modes[scoring_label],
+        "prefetch_budget": prefetch_budget,
+    }
+
+def display_cache_stats(embedding_stats, response_stats):
+    with st.sidebar.expander("🗄️ Caches"):
+        st.markdown(
+            "**Embeddings**  \n"
+            f"Hits: {embedding_stats['hits']} · Misses: {embedding_stats['misses']} · "
+            f"Hit rate: {embedding_stats['hit_rate']:.0%}  \n"
+            f"Cached vectors: {embedding_stats['entries']}"
+        )
+        st.markdown(
+            "**LLM responses**  \n"
+            f"Hits: {response_stats['hits']} (memory {response_stats['memory_hits']}, "
+            f"disk {response_stats['disk_hits']}) · Misses: {response_stats['misses']} · "
+            f"Hit rate: {response_stats['hit_rate']:.0%}"
+        )
+
+def display_resource_usage(usage):
+    with st.sidebar.expander("🧠 Resources"):
+        st.markdown(
+            f"Sessions: {usage['sessions']} · Indexes in memory: {usage['indexes_loaded']}  \n"
+            f"Memory: {usage['memory_mb']:.1f} / {usage['memory_budget_mb']:.0f} MB  \n"
+            f"Cache disk: {usage['disk_mb']:.1f} / {usage['disk_budget_mb']:.0f} MB  \n"
+            f"Indexes evicted: {usage['index_evictions']} · Sessions released: {usage['sessions_released']}"
+        )
+
+def display_metrics(trace, prometheus_text, json_text):
+    with st.sidebar.expander("📊 Performance"):
+        if not trace["stages"]:
+            st.caption("Run an analysis to see where the time goes.")
+        else:
+            st.markdown(f"**Last run:** `{trace['name']}`")
+            st.table([
+                {"Stage": stage, "Calls": total["calls"], "Seconds": round(total["seconds"], 3),
+                 "Errors": total["errors"]}
+                for stage, total in trace["totals"].items()
+            ])
+        counters = trace["counters"]
+        if counters:
+            st.markdown("  \n".join(f"{name}: {value:g}" for name, value in sorted(counters.items())))
+        st.download_button("Download trace (JSON)", data=json.dumps(trace, indent=2),
+                           file_name="analysis_trace.json", mime="application/json")
+        st.download_button("Download metrics (Prometheus)", data=prometheus_text,
+                           file_name="metrics.prom", mime="text/plain")
+        st.download_button("Download metrics (JSON)", data=json_text,
+                           file_name="metrics.json", mime="application/json")
+
+def _prefetch_caption(state):
+    """One line on the background prefetch of a tab's default request, if there is one."""
+    if state is None:
+        return
+    status, chars = state
+    if status == "done":
+        st.caption("⚡ Ready: prepared in the background for the default options.")
+    elif status in ("queued", "running"):
+        st.caption(f"⏳ Being prepared in the background for the default options ({chars} characters so far).")
 
 def create_tabs():
     return st.tabs([
@@ -66,21 +155,61 @@ def display_analysis_results(results):
         "Skill": list(results["skill_scores"].keys()),
         "Score (/10)": list(results["skill_scores"].values())
     }
+    skill_weights = results.get("skill_weights")
+    if skill_weights:
+        skill_data["Weight"] = [skill_weights.get(s, 1) for s in skill_data["Skill"]]
+    skill_paths = results.get("skill_paths")
+    if skill_paths:
+        skill_data["Scored by"] = [skill_paths[s] for s in skill_data["Skill"]]
     st.dataframe(skill_data, use_container_width=True)
+    if skill_paths:
+        without_llm = sum(1 for path in skill_paths.values() if not path.startswith("llm"))
+        st.caption(f"⚡ {without_llm} of {len(skill_paths)} skills scored without an LLM call.")
 
     # 📝 Skill Reasoning
     with st.expander("🔍 View Detailed Reasoning for Each Skill"):
         for skill, reasoning in results["skill_reasoning"].items():
             st.markdown(f"**{skill}**: {reasoning}")
 
-def resume_qa_section(has_resume, ask_question_func):
+def candidate_pool_section(label, skill_options, find_candidates_func, cutoff_sweep_func, default_cutoff=75):
+    with st.expander(f"👥 Candidate Pool: {label}"):
+        cutoff = st.slider("Selection cutoff (%)", min_value=0, max_value=100, value=default_cutoff, step=5,
+                           key="pool_cutoff")
+        sweep = cutoff_sweep_func(list(range(0, 101, 5)))
+        at_cutoff = next(entry for entry in sweep if entry["cutoff"] == cutoff)
+        total = sweep[0]["selected"]
+        st.markdown(f"**{at_cutoff['selected']} of {total}** stored candidates would be selected at {cutoff}%.")
+        st.line_chart({"Candidates selected": {entry["cutoff"]: entry["selected"] for entry in sweep}})
+
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            required = st.multiselect("Must have skills:", skill_options, key="pool_skills")
+        with col2:
+            min_skill = st.slider("Minimum skill score", min_value=0, max_value=10, value=7, key="pool_min_skill")
+        with col3:
+            k = st.number_input("Show top", min_value=1, max_value=500, value=20, key="pool_k")
+        matches, rows = find_candidates_func({skill: min_skill for skill in required}, int(k), cutoff)
+        st.caption(f"{matches} candidates match.")
+        if rows:
+            st.dataframe([
+                {"Rank": rank, "File": row["file"], "Overall (%)": row["overall_score"],
+                 "Selected": "✅" if row["selected"] else "❌", "Missing skills": ", ".join(row["missing_skills"])}
+                for rank, row in enumerate(rows, 1)
+            ], use_container_width=True, hide_index=True)
+
+def resume_qa_section(has_resume, ask_question_func, section_options=None):
     st.subheader("💬 Ask Questions About Your Resume")
     if has_resume:
         question = st.text_input("Enter your question:")
+        sections = []
+        if section_options:
+            sections = st.multiselect("Search only these sections (optional):", section_options,
+                                      format_func=str.title, key="qa_sections")
+        fresh = st.checkbox("🔄 Fresh answer (skip cache)", key="qa_fresh")
         if st.button("💬 Ask"):
             if question:
-                response = ask_question_func(question)
-                st.markdown(f"📝 **Answer:** {response}")
+                st.markdown("📝 **Answer:**")
+                _render_stream(ask_question_func(question, fresh, sections or None))
             else:
                 st.warning("⚠️ Please enter a question.")
     else:
@@ -97,9 +226,11 @@ def interview_questions_section(has_resume, generate_questions_func):
         )
         difficulty = st.selectbox("Select difficulty level:", ["Easy", "Medium", "Hard"])
         num_questions = st.slider("Number of questions:", min_value=1, max_value=10, value=5)
+        fresh = st.checkbox("🔄 Fresh questions (skip cache)", key="questions_fresh")
 
         if st.button("🚀 Generate Questions"):
-            raw_questions = generate_questions_func(question_types, difficulty, num_questions)
+            with st.spinner("Generating questions..."):
+                raw_questions = generate_questions_func(question_types, difficulty, num_questions, fresh)
             
             # Split big string response into list
             if isinstance(raw_questions, str):
@@ -110,7 +241,10 @@ def interview_questions_section(has_resume, generate_questions_func):
             if questions:
                 st.markdown("### 📑 Generated Interview Questions")
                 for idx, q in enumerate(questions, 1):
-                    with st.expander(f"❓ Question {idx}"):
+                    title = f"❓ Question {idx}"
+                    if isinstance(q, dict):
+                        title, q = f"{title} · {q['type']}", q["question"]
+                    with st.expander(title):
                         st.markdown(q)
                         st.code(q, language="markdown")
             else:
@@ -119,36 +253,42 @@ def interview_questions_section(has_resume, generate_questions_func):
         st.warning("⚠️ Please analyze a resume first.")
 
 
-def resume_improvement_section(has_resume, improve_resume_func):
+def resume_improvement_section(has_resume, improve_resume_func, default_areas=None, default_role="",
+                               prefetch_state=None):
     st.subheader("📈 Get Resume Improvement Suggestions")
     if has_resume:
+        _prefetch_caption(prefetch_state)
         improvement_areas = st.multiselect(
             "Select areas for improvement:",
-            ["Grammar", "Clarity", "Keyword Optimization", "Formatting", "Achievements Highlight"]
+            ["Grammar", "Clarity", "Keyword Optimization", "Formatting", "Achievements Highlight"],
+            default=default_areas or []
         )
-        target_role = st.text_input("Target Role (optional):")
+        target_role = st.text_input("Target Role (optional):", value=default_role)
+        fresh = st.checkbox("🔄 Fresh suggestions (skip cache)", key="improve_fresh")
 
         if st.button("✨ Get Suggestions"):
-            suggestions = improve_resume_func(improvement_areas, target_role)
-            if suggestions:
-                st.markdown("### 📝 Suggestions")
-                for area, suggestion in suggestions.items():
-                    st.markdown(f"**{area}:** {suggestion}")
-            else:
+            st.markdown("### 📝 Suggestions")
+            suggestions = _render_stream(improve_resume_func(improvement_areas, target_role, fresh))
+            if not suggestions:
                 st.error("⚠️ No improvement suggestions found.")
     else:
         st.warning("⚠️ Please analyze a resume first.")
 
-def improved_resume_section(has_resume, get_improved_resume_func):
+def improved_resume_section(has_resume, get_improved_resume_func, skill_options=None, default_skills=None,
+                            default_role="", prefetch_state=None):
     st.subheader("📝 Get an Improved Resume")
     if has_resume:
-        target_role = st.text_input("Enter Target Role:")
-        highlight_skills = st.multiselect("Select skills to highlight:", [])
+        _prefetch_caption(prefetch_state)
+        target_role = st.text_input("Enter Target Role:", value=default_role)
+        highlight_skills = st.multiselect(
+            "Select skills to highlight:", skill_options or [], default=default_skills or []
+        )
+        fresh = st.checkbox("🔄 Fresh rewrite (skip cache)", key="rewrite_fresh")
 
         if st.button("🚀 Generate Improved Resume"):
-            improved_resume = get_improved_resume_func(target_role, highlight_skills)
             st.markdown("### 📄 Preview of Improved Resume")
-            st.text_area("Improved Resume", improved_resume, height=300)
+            with st.container(height=300):
+                improved_resume = _render_stream(get_improved_resume_func(target_role, highlight_skills, fresh))
 
             st.download_button(
                 label="💾 Download Improved Resume",